@@ -15,6 +15,11 @@ the TelegramModerationApp with graceful shutdown on Ctrl+C.
 
 import asyncio
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - optional, unavailable on Windows
+    uvloop = None
+
 from spisdil_moder_bot import TelegramModerationApp
 from spisdil_moder_bot.config import BotSettings
 
@@ -26,6 +31,10 @@ async def _main() -> None:
 
 
 if __name__ == "__main__":
+    # Swap in the libuv event loop when available; every await in the bot and
+    # pipeline runs on this loop, so the faster task/socket paths are global.
+    if uvloop is not None:
+        uvloop.install()
     try:
         asyncio.run(_main())
     except KeyboardInterrupt:
@@ -2,21 +2,51 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import hashlib
+import re
 from dataclasses import dataclass
-from typing import Any, Literal, Optional
+from typing import Any, Literal, Optional, Sequence
 
 import httpx
 import structlog
-from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+try:
+    import orjson
+
+    def _json_dumps(payload: Any) -> bytes:
+        return orjson.dumps(payload)
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    def _json_dumps(payload: Any) -> bytes:
+        return json.dumps(payload).encode()
+
+    _json_loads = json.loads
+
+from ..logging.events import debug_enabled
+from ..utils.cache import ResultCache
 
 logger = structlog.get_logger(__name__)
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Models occasionally wrap JSON answers in markdown code fences.
+_CODE_FENCE_STRIP = re.compile(r"^[`\s]+|[`\s]+$")
+
+_MAX_ATTEMPTS = 5
+_INITIAL_BACKOFF = 0.5
+_MAX_BACKOFF = 5.0
+
 
 class OpenAIAdapterError(Exception):
     pass
 
 
 class OpenAIAdapter:
+    __slots__ = ("_base_url", "_client", "_owns_client")
+
     def __init__(
         self,
         api_key: str,
@@ -26,44 +56,90 @@ class OpenAIAdapter:
         client: Optional[httpx.AsyncClient] = None,
     ) -> None:
         self._base_url = base_url.rstrip("/")
-        self._client = client or httpx.AsyncClient(
-            base_url=self._base_url,
-            timeout=timeout,
+        self._client = client or self.build_client(api_key, base_url=base_url, timeout=timeout)
+        self._owns_client = client is None
+
+    @staticmethod
+    def build_client(
+        api_key: str,
+        *,
+        base_url: str = "https://api.openai.com/v1",
+        timeout: float = 15.0,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 64,
+        keepalive_expiry: float = 300.0,
+    ) -> httpx.AsyncClient:
+        """Build an HTTP/2 client with a keepalive pool sized for parallel layers.
+
+        Moderation traffic is many small POSTs to one host, so multiplexing
+        over persistent connections avoids per-request TLS handshakes.
+        """
+        return httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout, connect=5.0),
             headers={"Authorization": f"Bearer {api_key}"},
         )
-        self._owns_client = client is None
-        self._lock = asyncio.Lock()
 
     async def post(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
-        async with self._lock:
-            client = self._client
+        # httpx.AsyncClient is safe for concurrent requests; serializing access
+        # here would cap the whole adapter at one in-flight call.
+        client = self._client
 
-        retry = AsyncRetrying(
-            wait=wait_exponential(multiplier=0.5, min=0.5, max=5.0),
-            stop=stop_after_attempt(5),
-            retry=retry_if_exception_type((httpx.TimeoutException, httpx.ReadError)),
-        )
-        async for attempt in retry:
-            with attempt:
-                logger.debug(
-                    "openai_request",
-                    path=path,
-                    attempt=attempt.retry_state.attempt_number,
+        delay = _INITIAL_BACKOFF
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                if debug_enabled():
+                    logger.debug("openai_request", path=path, attempt=attempt)
+                response = await client.post(
+                    path, content=_json_dumps(payload), headers=_JSON_HEADERS
                 )
-                response = await client.post(path, json=payload)
-                if response.status_code >= 500:
+            except (httpx.TimeoutException, httpx.ReadError) as exc:
+                if attempt == _MAX_ATTEMPTS:
+                    raise OpenAIAdapterError("Retry exhausted") from exc
+                logger.debug("openai_retry", path=path, attempt=attempt, error=str(exc))
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_BACKOFF)
+                continue
+            if response.status_code >= 500:
+                if attempt == _MAX_ATTEMPTS:
                     response.raise_for_status()
-                if response.status_code >= 400:
-                    raise OpenAIAdapterError(f"API error: {response.status_code} {response.text}")
-                data = response.json()
                 logger.debug(
-                    "openai_response",
-                    path=path,
-                    status=response.status_code,
+                    "openai_retry", path=path, attempt=attempt, status=response.status_code
                 )
-                return data
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_BACKOFF)
+                continue
+            if response.status_code >= 400:
+                raise OpenAIAdapterError(f"API error: {response.status_code} {response.text}")
+            data = _json_loads(response.content)
+            if debug_enabled():
+                logger.debug("openai_response", path=path, status=response.status_code)
+            return data
         raise OpenAIAdapterError("Retry exhausted")
 
+    async def post_many(
+        self, requests: Sequence[tuple[str, dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        """Issue several POSTs concurrently over the shared connection pool.
+
+        All requests are scheduled at once so their round-trips overlap
+        instead of accumulating sequentially.
+        """
+        if not requests:
+            return []
+        if len(requests) == 1:
+            path, payload = requests[0]
+            return [await self.post(path, payload)]
+        return list(
+            await asyncio.gather(*(self.post(path, payload) for path, payload in requests))
+        )
+
     async def close(self) -> None:
         if self._owns_client:
             await self._client.aclose()
@@ -74,8 +150,51 @@ class OmniModerationResult:
     flagged: bool
     categories: dict[str, bool]
     category_scores: dict[str, float]
+
+
+def _result_from_payload(payload: dict[str, Any]) -> OmniModerationResult:
+    # Direct indexing on the hot keys; the API always sends categories and
+    # category_scores, so dict.get would pay for a default that never fires.
+    return OmniModerationResult(
+        flagged=payload["flagged"],
+        categories=payload["categories"] if "categories" in payload else {},
+        category_scores=payload["category_scores"] if "category_scores" in payload else {},
+    )
+
+
 class OmniModerationClient(OpenAIAdapter):
+    __slots__ = ("_cache",)
+
+    MAX_BATCH_INPUT = 32
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        cache_ttl_seconds: float = 300.0,
+        cache_max_entries: int = 2048,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(api_key, **kwargs)
+        self._cache: ResultCache[OmniModerationResult] = ResultCache(
+            max_entries=cache_max_entries,
+            ttl_seconds=cache_ttl_seconds,
+        )
+
+    @staticmethod
+    def _cache_key(model: str, content: str | bytes) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(model.encode())
+        digest.update(b"|")
+        digest.update(content if isinstance(content, bytes) else content.encode())
+        return digest.digest()
+
     async def classify(self, text: str, *, model: str = "omni-moderation-latest") -> OmniModerationResult:
+        key = self._cache_key(model, text)
+        cached = await self._cache.get(key)
+        if cached is not None:
+            logger.debug("omni_cache_hit", model=model, text_preview=text[:60])
+            return cached
         payload = {
             "model": model,
             "input": [
@@ -87,12 +206,57 @@ class OmniModerationClient(OpenAIAdapter):
         }
         logger.debug("omni_api_call", model=model, text_preview=text[:60])
         data = await self.post("/moderations", payload)
-        result = data["results"][0]
-        return OmniModerationResult(
-            flagged=result["flagged"],
-            categories=result.get("categories", {}),
-            category_scores=result.get("category_scores", {}),
-        )
+        parsed = _result_from_payload(data["results"][0])
+        await self._cache.set(key, parsed)
+        return parsed
+
+    async def classify_batch(
+        self,
+        texts: Sequence[str],
+        *,
+        model: str = "omni-moderation-latest",
+    ) -> list[OmniModerationResult]:
+        """Classify several texts with as few /moderations round-trips as possible.
+
+        Cached entries are served directly; the rest are grouped into array
+        inputs of at most ``MAX_BATCH_INPUT`` items per request, issued
+        concurrently over the shared pool. Results are returned in the same
+        order as ``texts``.
+        """
+        results: list[Optional[OmniModerationResult]] = [None] * len(texts)
+        pending: list[tuple[int, bytes, str]] = []
+        for index, text in enumerate(texts):
+            key = self._cache_key(model, text)
+            cached = await self._cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, key, text))
+        chunks = [
+            pending[start : start + self.MAX_BATCH_INPUT]
+            for start in range(0, len(pending), self.MAX_BATCH_INPUT)
+        ]
+        if chunks:
+            requests = [
+                (
+                    "/moderations",
+                    {
+                        "model": model,
+                        "input": [{"type": "text", "text": text} for _, _, text in chunk],
+                    },
+                )
+                for chunk in chunks
+            ]
+            logger.debug(
+                "omni_api_batch_call", model=model, size=len(pending), chunks=len(chunks)
+            )
+            payloads = await self.post_many(requests)
+            for chunk, data in zip(chunks, payloads):
+                for (index, key, _), raw in zip(chunk, data["results"]):
+                    parsed = _result_from_payload(raw)
+                    await self._cache.set(key, parsed)
+                    results[index] = parsed
+        return results  # type: ignore[return-value]
 
     async def classify_image(
         self,
@@ -101,12 +265,18 @@ class OmniModerationClient(OpenAIAdapter):
         model: str = "omni-moderation-latest",
     ) -> OmniModerationResult:
         if isinstance(image, bytes):
-            encoded = base64.b64encode(image).decode("ascii")
-            image_url = f"data:image/png;base64,{encoded}"
+            # Single bytes concatenation plus one decode, instead of
+            # materializing the base64 text and the data URL separately.
+            image_url = (b"data:image/png;base64," + base64.b64encode(image)).decode("ascii")
         elif isinstance(image, str):
             image_url = image if image.startswith("data:") else image
         else:
             raise TypeError("Unsupported image payload")
+        key = self._cache_key(model, image)
+        cached = await self._cache.get(key)
+        if cached is not None:
+            logger.debug("omni_cache_hit_image", model=model)
+            return cached
         payload = {
             "model": model,
             "input": [
@@ -118,20 +288,9 @@ class OmniModerationClient(OpenAIAdapter):
         }
         logger.debug("omni_api_image_call", model=model)
         data = await self.post("/moderations", payload)
-        result = data["results"][0]
-        return OmniModerationResult(
-            flagged=result["flagged"],
-            categories=result.get("categories", {}),
-            category_scores=result.get("category_scores", {}),
-        )
-        logger.debug("omni_api_image_call", model=model)
-        data = await self.post("/moderations", payload)
-        result = data["results"][0]
-        return OmniModerationResult(
-            flagged=result["flagged"],
-            categories=result.get("categories", {}),
-            category_scores=result.get("category_scores", {}),
-        )
+        parsed = _result_from_payload(data["results"][0])
+        await self._cache.set(key, parsed)
+        return parsed
 
 
 @dataclass(slots=True)
@@ -153,6 +312,8 @@ class ChatCompletionResult:
 
 
 class GPTClient(OpenAIAdapter):
+    __slots__ = ()
+
     async def complete(self, request: ChatCompletionRequest) -> ChatCompletionResult:
         payload = {
             "model": request.model,
@@ -193,40 +354,64 @@ class RuleSynthesisResult:
     priority: int
 
 
+_RULE_SYNTHESIS_SYSTEM_PROMPT = (
+    "Moderation policy assistant. Classify rules into layers. Return ONLY JSON.\n\n"
+    "LAYERS:\n"
+    "1. 'regex' - Pattern matching (e.g., 'block word X', 'ban URLs')\n"
+    "   Fields: regex (pattern), rule_type='regex', priority\n\n"
+    "2. 'omni' - OpenAI Moderation API (AI content detection)\n"
+    "   Fields: category (EXACT match from list below), rule_type='semantic', priority\n"
+    "   VALID CATEGORIES:\n"
+    "   - hate, hate/threatening\n"
+    "   - harassment, harassment/threatening\n"
+    "   - self-harm, self-harm/intent, self-harm/instructions\n"
+    "   - sexual, sexual/minors\n"
+    "   - violence, violence/graphic\n"
+    "   - illicit, illicit/violent\n"
+    "   NO regex field for omni!\n\n"
+    "3. 'chatgpt' - Contextual analysis (custom categories)\n"
+    "   Fields: category (e.g., 'spam', 'advertising', 'trolling'), rule_type='contextual', priority\n"
+    "   NO regex field for chatgpt!\n\n"
+    "RULES:\n"
+    "- Use 'omni' ONLY if category matches list above EXACTLY\n"
+    "- Use 'chatgpt' for all other categories (spam, ads, etc.)\n"
+    "- Never include 'regex' field for omni/chatgpt\n\n"
+    "Return JSON: {rule_type, layer, category, regex (regex only!), priority (0-100)}"
+)
+
+
 class RuleSynthesisClient(OpenAIAdapter):
+    __slots__ = ("_cache",)
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        cache_ttl_seconds: float = 3600.0,
+        cache_max_entries: int = 256,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(api_key, **kwargs)
+        self._cache: ResultCache[RuleSynthesisResult] = ResultCache(
+            max_entries=cache_max_entries,
+            ttl_seconds=cache_ttl_seconds,
+        )
+
     async def classify_rule(
         self, request: RuleSynthesisRequest, *, model: str = "gpt-5-mini"
     ) -> RuleSynthesisResult:
+        cache_key = (model, request.rule_text, request.source, request.desired_action)
+        cached = await self._cache.get(cache_key)
+        if cached is not None:
+            logger.debug("rule_synthesis_cache_hit", text_preview=request.rule_text[:60])
+            return cached
         payload = {
             "model": model,
             "response_format": {"type": "json_object"},
             "messages": [
                 {
                     "role": "system",
-                    "content": (
-                        "Moderation policy assistant. Classify rules into layers. Return ONLY JSON.\n\n"
-                        "LAYERS:\n"
-                        "1. 'regex' - Pattern matching (e.g., 'block word X', 'ban URLs')\n"
-                        "   Fields: regex (pattern), rule_type='regex', priority\n\n"
-                        "2. 'omni' - OpenAI Moderation API (AI content detection)\n"
-                        "   Fields: category (EXACT match from list below), rule_type='semantic', priority\n"
-                        "   VALID CATEGORIES:\n"
-                        "   - hate, hate/threatening\n"
-                        "   - harassment, harassment/threatening\n"
-                        "   - self-harm, self-harm/intent, self-harm/instructions\n"
-                        "   - sexual, sexual/minors\n"
-                        "   - violence, violence/graphic\n"
-                        "   - illicit, illicit/violent\n"
-                        "   NO regex field for omni!\n\n"
-                        "3. 'chatgpt' - Contextual analysis (custom categories)\n"
-                        "   Fields: category (e.g., 'spam', 'advertising', 'trolling'), rule_type='contextual', priority\n"
-                        "   NO regex field for chatgpt!\n\n"
-                        "RULES:\n"
-                        "- Use 'omni' ONLY if category matches list above EXACTLY\n"
-                        "- Use 'chatgpt' for all other categories (spam, ads, etc.)\n"
-                        "- Never include 'regex' field for omni/chatgpt\n\n"
-                        "Return JSON: {rule_type, layer, category, regex (regex only!), priority (0-100)}"
-                    ),
+                    "content": _RULE_SYNTHESIS_SYSTEM_PROMPT,
                 },
                 {
                     "role": "user",
@@ -237,17 +422,17 @@ class RuleSynthesisClient(OpenAIAdapter):
         logger.debug("rule_synthesis_call", model=model, text_preview=request.rule_text[:60])
         data = await self.post("/chat/completions", payload)
         content = data["choices"][0]["message"]["content"]
-        import json
-
         try:
-            parsed = json.loads(content.strip("` \n"))
+            parsed = _json_loads(_CODE_FENCE_STRIP.sub("", content))
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("rule_synthesis_parse_failed", error=str(exc), content=content)
             raise OpenAIAdapterError("Failed to parse rule synthesis response") from exc
-        return RuleSynthesisResult(
+        result = RuleSynthesisResult(
             rule_type=parsed.get("rule_type", "semantic"),
             layer=parsed.get("layer", "chatgpt"),
             category=parsed.get("category", "other"),
             regex=parsed.get("regex"),
             priority=int(parsed.get("priority", 10)),
         )
+        await self._cache.set(cache_key, result)
+        return result
@@ -1,19 +1,19 @@
 from __future__ import annotations
 
 import asyncio
-from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import AsyncIterator, Deque, Optional
+from typing import AsyncIterator, Iterable, Optional
 
 import structlog
 
+from ..logging.events import debug_enabled
 from ..models import MessageEnvelope
 
 
 @dataclass(slots=True)
 class MessageBatch:
-    items: list[MessageEnvelope]
+    items: tuple[MessageEnvelope, ...]
     created_at: datetime
     flush_reason: str
 
@@ -39,10 +39,11 @@ class MessageBatcher:
         self._loop = loop or asyncio.get_event_loop()
         self._max_batch_size = max_batch_size
         self._max_delay = max_delay
-        self._pending: Deque[MessageEnvelope] = deque()
+        # Append-only between flushes (flush copies and clears), so a plain
+        # list beats a deque: no block-chaining overhead, cheaper copy.
+        self._pending: list[MessageEnvelope] = []
         self._queue: asyncio.Queue[MessageBatch] = asyncio.Queue()
         self._flush_task: Optional[asyncio.Task[None]] = None
-        self._lock = asyncio.Lock()
         self._stopped = asyncio.Event()
         self._drained = False
 
@@ -57,8 +58,7 @@ class MessageBatcher:
 
     async def stop(self) -> None:
         self._stopped.set()
-        async with self._lock:
-            await self._flush("stop")
+        await self._flush("stop")
         if self._flush_task:
             self._flush_task.cancel()
             self._flush_task = None
@@ -73,18 +73,33 @@ class MessageBatcher:
         await self.stop()
 
     async def submit(self, message: MessageEnvelope) -> None:
-        async with self._lock:
-            self._pending.append(message)
+        # Runs entirely on the event loop with no suspension point between
+        # append and flush, so no lock is needed to keep the buffer coherent.
+        self._pending.append(message)
+        if debug_enabled():
             logger.debug(
                 "batcher_message_enqueued",
                 queue_size=len(self._pending),
                 chat_id=message.context.chat_id,
                 user_id=message.context.user_id,
             )
-            if len(self._pending) == 1:
-                self._schedule_timer()
-            if len(self._pending) >= self._max_batch_size:
-                await self._flush("size")
+        if len(self._pending) == 1:
+            self._schedule_timer()
+        if len(self._pending) >= self._max_batch_size:
+            await self._flush("size")
+
+    async def submit_many(self, messages: Iterable[MessageEnvelope]) -> None:
+        """Enqueue several messages with one append/flush round."""
+        was_empty = not self._pending
+        self._pending.extend(messages)
+        if not self._pending:
+            return
+        if debug_enabled():
+            logger.debug("batcher_messages_enqueued", queue_size=len(self._pending))
+        if was_empty:
+            self._schedule_timer()
+        if len(self._pending) >= self._max_batch_size:
+            await self._flush("size")
 
     def _schedule_timer(self) -> None:
         if self._flush_task and not self._flush_task.done():
@@ -92,10 +107,17 @@ class MessageBatcher:
         self._flush_task = self._loop.create_task(self._delayed_flush())
 
     async def _delayed_flush(self) -> None:
+        # Flush against a monotonic deadline rather than a single fixed sleep,
+        # so a coarse or early wakeup cannot fire the timer before max_delay
+        # has actually elapsed.
+        deadline = self._loop.time() + self._max_delay
         try:
-            await asyncio.sleep(self._max_delay)
-            async with self._lock:
-                await self._flush("timer")
+            while True:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+            await self._flush("timer")
         except asyncio.CancelledError:
             pass
 
@@ -103,7 +125,7 @@ class MessageBatcher:
         if not self._pending:
             return
         batch = MessageBatch(
-            items=list(self._pending),
+            items=tuple(self._pending),
             created_at=datetime.now(timezone.utc),
             flush_reason=reason,
         )
@@ -118,7 +140,10 @@ class MessageBatcher:
         if self._drained and self._queue.empty():
             raise RuntimeError("Batcher has been stopped and drained.")
         batch = await self._queue.get()
-        logger.debug("batcher_batch_dequeued", size=len(batch.items), reason=batch.flush_reason)
+        if debug_enabled():
+            logger.debug(
+                "batcher_batch_dequeued", size=len(batch.items), reason=batch.flush_reason
+            )
         return batch
 
     def __aiter__(self) -> AsyncIterator[MessageBatch]:
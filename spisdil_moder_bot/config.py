@@ -23,10 +23,16 @@ class OpenAISettings(BaseModel):
     api_key: str
     base_url: str = "https://api.openai.com/v1"
     timeout_seconds: float = 15.0
+    moderation_cache_ttl_seconds: float = Field(default=300.0, gt=0)
+    moderation_cache_max_entries: int = Field(default=2048, ge=1)
+    max_connections: int = Field(default=64, ge=1)
+    max_keepalive_connections: int = Field(default=64, ge=0)
+    keepalive_expiry_seconds: float = Field(default=300.0, gt=0)
 
 
 class StorageSettings(BaseModel):
     sqlite_path: str = "moderation.db"
+    result_cache_ttl_seconds: float = Field(default=3600.0, gt=0)
 
 
 class LoggingSettings(BaseModel):
@@ -6,6 +6,26 @@ from typing import Any
 
 import structlog
 
+try:
+    import orjson
+
+    def _json_serializer(payload: Any, **_: Any) -> str:
+        return orjson.dumps(payload, default=str).decode()
+except ImportError:
+    import json
+
+    def _json_serializer(payload: Any, **_: Any) -> str:
+        return json.dumps(payload, default=str)
+
+
+# Flipped by setup_logging; hot paths consult it to skip assembling debug
+# kwargs entirely when debug logging is off.
+DEBUG_ENABLED = False
+
+
+def debug_enabled() -> bool:
+    return DEBUG_ENABLED
+
 
 # ANSI color codes
 class Colors:
@@ -48,32 +68,38 @@ def _format_key_value(key: str, value: Any) -> str:
     return f"{Colors.KEY}{key}{Colors.RESET}={_colorize_value(value)}"
 
 
+# Per-level prefixes rendered once at import instead of per event.
+_LEVEL_PREFIXES = {
+    level: f"{color}{Colors.BOLD}{level:8}{Colors.RESET}"
+    for level, color in (
+        ("DEBUG", Colors.DEBUG),
+        ("INFO", Colors.INFO),
+        ("WARNING", Colors.WARNING),
+        ("ERROR", Colors.ERROR),
+        ("CRITICAL", Colors.CRITICAL),
+    )
+}
+_KV_SEPARATOR = f" {Colors.DIM}|{Colors.RESET} "
+_KV_PREFIX = f"{Colors.DIM}|{Colors.RESET} "
+
+
 class ColoredConsoleRenderer:
     """Custom structlog renderer with ANSI colors and human-readable format."""
 
     def __init__(self, colored: bool = True):
         self.colored = colored and sys.stdout.isatty()
+        self._fallback = structlog.processors.JSONRenderer(serializer=_json_serializer)
 
     def __call__(self, logger: Any, name: str, event_dict: dict) -> str:
         if not self.colored:
             # Fallback to simple format if colors disabled
-            return structlog.processors.JSONRenderer()(logger, name, event_dict)
+            return self._fallback(logger, name, event_dict)
 
         # Extract standard fields
         timestamp = event_dict.pop("timestamp", "")
         level = event_dict.pop("level", "info").upper()
         event = event_dict.pop("event", "")
 
-        # Color level based on severity
-        level_colors = {
-            "DEBUG": Colors.DEBUG,
-            "INFO": Colors.INFO,
-            "WARNING": Colors.WARNING,
-            "ERROR": Colors.ERROR,
-            "CRITICAL": Colors.CRITICAL,
-        }
-        level_color = level_colors.get(level, Colors.INFO)
-
         # Build the log line
         parts = []
 
@@ -81,8 +107,11 @@ class ColoredConsoleRenderer:
         if timestamp:
             parts.append(f"{Colors.TIMESTAMP}[{timestamp}]{Colors.RESET}")
 
-        # Level with color and padding
-        parts.append(f"{level_color}{Colors.BOLD}{level:8}{Colors.RESET}")
+        # Level with color and padding (prefix precomputed at import)
+        prefix = _LEVEL_PREFIXES.get(level)
+        if prefix is None:
+            prefix = f"{Colors.INFO}{Colors.BOLD}{level:8}{Colors.RESET}"
+        parts.append(prefix)
 
         # Event name
         parts.append(f"{Colors.EVENT}{event}{Colors.RESET}")
@@ -90,7 +119,7 @@ class ColoredConsoleRenderer:
         # Remaining key-value pairs
         if event_dict:
             kv_pairs = [_format_key_value(k, v) for k, v in event_dict.items()]
-            parts.append(f"{Colors.DIM}|{Colors.RESET} " + f" {Colors.DIM}|{Colors.RESET} ".join(kv_pairs))
+            parts.append(_KV_PREFIX + _KV_SEPARATOR.join(kv_pairs))
 
         return " ".join(parts)
 
@@ -103,9 +132,13 @@ def setup_logging(level: int = logging.INFO, use_json: bool = False) -> None:
         level: Logging level (default: INFO)
         use_json: If True, use JSON format instead of colored output (default: False)
     """
-    # Choose renderer based on preference
+    global DEBUG_ENABLED
+    DEBUG_ENABLED = level <= logging.DEBUG
+
+    # Choose renderer based on preference; orjson serializes the event dict
+    # in one C pass instead of stdlib json's pure-Python encoder.
     if use_json:
-        renderer = structlog.processors.JSONRenderer()
+        renderer = structlog.processors.JSONRenderer(serializer=_json_serializer)
     else:
         renderer = ColoredConsoleRenderer(colored=True)
 
@@ -124,24 +157,37 @@ def setup_logging(level: int = logging.INFO, use_json: bool = False) -> None:
     class ColoredFormatter(logging.Formatter):
         """Colored formatter for stdlib loggers."""
 
-        LEVEL_COLORS = {
-            logging.DEBUG: Colors.DEBUG,
-            logging.INFO: Colors.INFO,
-            logging.WARNING: Colors.WARNING,
-            logging.ERROR: Colors.ERROR,
-            logging.CRITICAL: Colors.CRITICAL,
+        # Full prefixes precomputed per level so format() is a dict lookup
+        # instead of assembling the same escape sequences on every record.
+        LEVEL_PREFIXES = {
+            levelno: f"{color}{Colors.BOLD}{logging.getLevelName(levelno):8}{Colors.RESET}"
+            for levelno, color in (
+                (logging.DEBUG, Colors.DEBUG),
+                (logging.INFO, Colors.INFO),
+                (logging.WARNING, Colors.WARNING),
+                (logging.ERROR, Colors.ERROR),
+                (logging.CRITICAL, Colors.CRITICAL),
+            )
         }
 
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            # The stream does not change after setup; checking per record is
+            # a wasted syscall in the hottest shared log path.
+            self._is_tty = sys.stdout.isatty()
+
         def format(self, record: logging.LogRecord) -> str:
-            if not sys.stdout.isatty():
+            if not self._is_tty:
                 return super().format(record)
 
-            level_color = self.LEVEL_COLORS.get(record.levelno, Colors.INFO)
+            prefix = self.LEVEL_PREFIXES.get(record.levelno)
+            if prefix is None:
+                prefix = f"{Colors.INFO}{Colors.BOLD}{record.levelname:8}{Colors.RESET}"
             timestamp = self.formatTime(record, "%H:%M:%S")
 
             return (
                 f"{Colors.TIMESTAMP}[{timestamp}]{Colors.RESET} "
-                f"{level_color}{Colors.BOLD}{record.levelname:8}{Colors.RESET} "
+                f"{prefix} "
                 f"{Colors.DIM}{record.name}{Colors.RESET} "
                 f"{Colors.VALUE}{record.getMessage()}{Colors.RESET}"
             )
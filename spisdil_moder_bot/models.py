@@ -34,6 +34,12 @@ class RuleType(str, Enum):
     CONTEXTUAL = "contextual"
 
 
+# Precomputed value-to-member tables; cheaper than the Enum constructor on hot
+# paths and they return None for unknown values instead of raising.
+LAYER_BY_VALUE = {layer.value: layer for layer in LayerType}
+RULE_TYPE_BY_VALUE = {rule_type.value: rule_type for rule_type in RuleType}
+
+
 @dataclass(slots=True)
 class ChatContext:
     chat_id: int
@@ -70,6 +76,29 @@ class ModerationVerdict:
     def short_circuit(self) -> bool:
         return self.violated and self.action != ActionType.NONE
 
+    def to_payload(self) -> dict:
+        return {
+            "layer": self.layer.value,
+            "rule_code": self.rule_code,
+            "priority": int(self.priority),
+            "action": self.action.value,
+            "reason": self.reason,
+            "violated": self.violated,
+            "details": self.details,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "ModerationVerdict":
+        return cls(
+            layer=LayerType(payload["layer"]),
+            rule_code=payload["rule_code"],
+            priority=ViolationPriority(payload["priority"]),
+            action=ActionType(payload["action"]),
+            reason=payload["reason"],
+            violated=payload["violated"],
+            details=payload.get("details", {}),
+        )
+
 
 @dataclass(slots=True)
 class ModerationResult:
@@ -100,7 +129,9 @@ class ModerationRule:
 __all__ = [
     "ActionType",
     "ChatContext",
+    "LAYER_BY_VALUE",
     "LayerType",
+    "RULE_TYPE_BY_VALUE",
     "MessageEnvelope",
     "ModerationResult",
     "ModerationRule",
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import abc
-from typing import Protocol, runtime_checkable
+from typing import Protocol, Sequence, runtime_checkable
 
 from ...models import LayerType, MessageEnvelope, ModerationVerdict
 
+# Texts shorter than this carry no moderatable signal; the API-backed layers
+# skip them instead of spending a round-trip.
+MIN_ANALYZABLE_TEXT_LENGTH = 3
+
 
 class ModerationLayer(abc.ABC):
     """Base class for moderation layers."""
@@ -18,6 +22,14 @@ class ModerationLayer(abc.ABC):
     async def evaluate(self, message: MessageEnvelope) -> ModerationVerdict | None:
         ...
 
+    def should_run(self, best_so_far: ModerationVerdict | None) -> bool:
+        """Hook for expensive layers to opt out when an earlier verdict already decides the outcome."""
+        return True
+
+    async def prefetch_batch(self, messages: Sequence[MessageEnvelope]) -> None:
+        """Hook for layers that can warm their caches with one grouped request."""
+        return None
+
     def __lt__(self, other: "ModerationLayer") -> bool:
         return self.priority < other.priority
 
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
+import re
 from typing import Optional
 
 import structlog
 
+try:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers keep
+    # catching the stdlib type.
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 from ...adapters.openai import ChatCompletionRequest, GPTClient, OpenAIAdapterError
 from ...models import (
     ActionType,
@@ -16,10 +27,35 @@ from ...models import (
     ViolationPriority,
 )
 from ...rules.registry import RuleRegistry
-from ..layers.base import ModerationLayer
+from ...logging.events import debug_enabled
+from ...utils.cache import ResultCache
+from ..layers.base import MIN_ANALYZABLE_TEXT_LENGTH, ModerationLayer
 
 logger = structlog.get_logger(__name__)
 
+# Widest brace-to-brace span; one C-level scan that also skips ```json fences
+# and surrounding prose.
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Canonical actions plus the synonyms GPT tends to emit, resolved with one
+# dict lookup instead of a synonym pass and an ActionType() try/except.
+_ACTION_MAP: dict[str, ActionType] = {
+    **{action.value: action for action in ActionType},
+    "delete_message": ActionType.DELETE,
+    "remove_message": ActionType.DELETE,
+    "remove": ActionType.DELETE,
+    "kick": ActionType.BAN,
+    "ban_user": ActionType.BAN,
+    "no_action": ActionType.NONE,
+}
+
+_SEVERITY_MAP: dict[str, ViolationPriority] = {
+    "threats": ViolationPriority.THREATS,
+    "nsfw": ViolationPriority.NSFW,
+    "hate": ViolationPriority.HATE,
+    "spam": ViolationPriority.SPAM,
+}
+
 
 class ChatGPTLayer(ModerationLayer):
     layer_type = LayerType.CHATGPT
@@ -31,12 +67,25 @@ class ChatGPTLayer(ModerationLayer):
         *,
         model: str = "gpt-5-nano",
         concurrency_limit: int = 2,
+        cache_ttl_seconds: float = 300.0,
+        cache_max_entries: int = 2048,
     ) -> None:
         super().__init__(priority=30)
         self._client = client
         self._rules = rules
         self._model = model
         self._semaphore = asyncio.Semaphore(concurrency_limit)
+        # Parsed classifications keyed by content hash + rules version, plus a
+        # single-flight map so duplicate texts in flight share one API call.
+        self._response_cache: ResultCache[tuple[dict, int, int, int]] = ResultCache(
+            max_entries=cache_max_entries, ttl_seconds=cache_ttl_seconds
+        )
+        self._inflight: dict[str, asyncio.Future[Optional[tuple[dict, int, int, int]]]] = {}
+        # Rendered rules blocks keyed by (chat_id, registry version); identical
+        # for every message in a chat until the rules change. None records a
+        # rule set with nothing categorized.
+        self._rules_block_cache: dict[tuple[Optional[int], int], Optional[str]] = {}
+        self._rules_block_version = -1
         self._system_prompt = (
             "Strict moderation. Output format: single JSON only.\n"
             "{\"violation\":bool,\"category\":str,\"severity\":str,\"action\":str,\"reason\":str}\n"
@@ -46,36 +95,135 @@ class ChatGPTLayer(ModerationLayer):
             "If none apply, respond with violation=false and action='none'.\n"
             "No text before/after JSON. No explanations. No markdown. No reasoning."
         )
+        # The system message never changes; build the dict once instead of
+        # per request.
+        self._system_message = {"role": "system", "content": self._system_prompt}
+
+    def should_run(self, best_so_far: ModerationVerdict | None) -> bool:
+        # The GPT call costs seconds and real money; skip it when an earlier
+        # layer already produced a violation that wins aggregation regardless.
+        return best_so_far is None or best_so_far.priority < ViolationPriority.HATE
 
     async def evaluate(self, message: MessageEnvelope) -> ModerationVerdict | None:
         text = message.content_text()
-        if not text and not message.images:
+        if (not text or len(text.strip()) < MIN_ANALYZABLE_TEXT_LENGTH) and not message.images:
             logger.debug("chatgpt_skip_no_text", message_id=message.context.message_id)
             return None
 
         available_rules = await self._rules.get_rules_for_layer(LayerType.CHATGPT, chat_id=message.context.chat_id)
+        cache_key = self._cache_key(
+            self._model, self._rules.version, message.context.chat_id, text, message.images
+        )
+        classified = await self._response_cache.get(cache_key)
+        if classified is None:
+            inflight = self._inflight.get(cache_key)
+            if inflight is not None:
+                # Duplicate content already in flight; wait for its result
+                # instead of issuing a second API call.
+                classified = await inflight
+            else:
+                future: asyncio.Future[Optional[tuple[dict, int, int, int]]] = (
+                    asyncio.get_running_loop().create_future()
+                )
+                self._inflight[cache_key] = future
+                try:
+                    classified = await self._request_classification(message, available_rules)
+                except BaseException:
+                    future.cancel()
+                    raise
+                else:
+                    future.set_result(classified)
+                finally:
+                    self._inflight.pop(cache_key, None)
+                if classified is not None:
+                    await self._response_cache.set(cache_key, classified)
+
+        if classified is None:
+            return None
+        data, total_tokens, prompt_tokens, completion_tokens = classified
+
+        if not data.get("violation"):
+            logger.debug("chatgpt_not_flagged", message_id=message.context.message_id)
+            return None
+
+        category = str(data.get("category", "other")).lower()
+        severity = str(data.get("severity", category)).lower()
+        gpt_suggested_action = self._action_from_payload(data.get("action", "warn"))
+        rule = self._resolve_rule(category, available_rules)
+
+        if not rule:
+            logger.warning(
+                "chatgpt_violation_no_rule",
+                category=category,
+                severity=severity,
+                gpt_suggested_action=gpt_suggested_action.value,
+                reason=data.get("reason"),
+                message_id=message.context.message_id,
+            )
+            return None
+
+        logger.info(
+            "chatgpt_violation",
+            rule_code=rule.rule_id,
+            category=category,
+            configured_action=rule.action.value,
+            message_id=message.context.message_id,
+        )
+        details = {
+            "raw": data,
+            "total_tokens": total_tokens,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "gpt_severity": severity,
+        }
+        if rule.action_duration_seconds is not None:
+            details["action_duration_seconds"] = rule.action_duration_seconds
+        return ModerationVerdict(
+            layer=self.layer_type,
+            rule_code=rule.rule_id,
+            priority=rule.priority,
+            action=rule.action,
+            reason=data.get("reason") or rule.description,
+            violated=True,
+            details=details,
+        )
+
+    @staticmethod
+    def _cache_key(
+        model: str,
+        rules_version: int,
+        chat_id: Optional[int],
+        text: str,
+        images: Optional[list[str]],
+    ) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{model}|{rules_version}|{chat_id}|".encode())
+        digest.update(text.encode())
+        for image in (images or ())[:4]:
+            digest.update(b"|")
+            digest.update(image.encode() if isinstance(image, str) else bytes(image))
+        return digest.hexdigest()
+
+    async def _request_classification(
+        self,
+        message: MessageEnvelope,
+        available_rules: tuple[ModerationRule, ...],
+    ) -> Optional[tuple[dict, int, int, int]]:
+        """Call the API and parse its verdict; None means a non-cacheable failure."""
         user_payload = self._build_user_payload(
             message,
-            available_rules=[rule for rule in available_rules if rule.category] or None,
+            rules_block=self._rules_block(available_rules, chat_id=message.context.chat_id),
         )
-        user_content = [
-            {
-                "type": "text",
-                "text": user_payload,
-            }
-        ]
-        if message.images:
-            for image in message.images[:4]:
-                user_content.append(
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": image},
-                    }
-                )
+        images = message.images
+        user_content: list[dict] = [{"type": "text", "text": user_payload}]
+        if images:
+            user_content += [
+                {"type": "image_url", "image_url": {"url": image}} for image in images[:4]
+            ]
         request = ChatCompletionRequest(
             model=self._model,
             messages=[
-                {"role": "system", "content": self._system_prompt},
+                self._system_message,
                 {"role": "user", "content": user_content},
             ],
             max_completion_tokens=2048,
@@ -83,26 +231,31 @@ class ChatGPTLayer(ModerationLayer):
         )
         async with self._semaphore:
             try:
-                logger.debug(
-                    "chatgpt_request",
-                    message_id=message.context.message_id,
-                    model=self._model,
-                    user_payload_length=len(user_payload),
-                    system_prompt_length=len(self._system_prompt),
-                )
+                if debug_enabled():
+                    logger.debug(
+                        "chatgpt_request",
+                        message_id=message.context.message_id,
+                        model=self._model,
+                        user_payload_length=len(user_payload),
+                        system_prompt_length=len(self._system_prompt),
+                    )
                 completion = await self._client.complete(request)
-                logger.debug(
-                    "chatgpt_response_received",
-                    message_id=message.context.message_id,
-                    finish_reason=completion.finish_reason,
-                    total_tokens=completion.tokens,
-                    prompt_tokens=completion.prompt_tokens,
-                    completion_tokens=completion.completion_tokens,
-                    content_length=len(completion.content) if completion.content else 0,
-                    content_preview=completion.content[:150] if completion.content else "",
-                )
+                if debug_enabled():
+                    logger.debug(
+                        "chatgpt_response_received",
+                        message_id=message.context.message_id,
+                        finish_reason=completion.finish_reason,
+                        total_tokens=completion.tokens,
+                        prompt_tokens=completion.prompt_tokens,
+                        completion_tokens=completion.completion_tokens,
+                        content_length=len(completion.content) if completion.content else 0,
+                        content_preview=completion.content[:150] if completion.content else "",
+                    )
             except OpenAIAdapterError as exc:
                 logger.error("chatgpt_api_error", error=str(exc), message_id=message.context.message_id)
+                # Flag the envelope so the scheduler does not cache this
+                # unevaluated message as a clean verdict.
+                message.metadata["evaluation_error"] = True
                 return None
 
         if completion.finish_reason == "length":
@@ -119,12 +272,13 @@ class ChatGPTLayer(ModerationLayer):
 
         try:
             data = self._extract_json(completion.content)
-            logger.debug(
-                "chatgpt_json_parsed",
-                message_id=message.context.message_id,
-                violation=data.get("violation"),
-                category=data.get("category"),
-            )
+            if debug_enabled():
+                logger.debug(
+                    "chatgpt_json_parsed",
+                    message_id=message.context.message_id,
+                    violation=data.get("violation"),
+                    category=data.get("category"),
+                )
         except json.JSONDecodeError as exc:
             logger.error(
                 "chatgpt_invalid_json",
@@ -135,52 +289,11 @@ class ChatGPTLayer(ModerationLayer):
             )
             return None
 
-        if not data.get("violation"):
-            logger.debug("chatgpt_not_flagged", message_id=message.context.message_id)
-            return None
-
-        category = str(data.get("category", "other")).lower()
-        severity = str(data.get("severity", category)).lower()
-        gpt_suggested_action = self._action_from_payload(data.get("action", "warn"))
-        rule = await self._resolve_rule(category, chat_id=message.context.chat_id)
-
-        if not rule:
-            logger.warning(
-                "chatgpt_violation_no_rule",
-                category=category,
-                severity=severity,
-                gpt_suggested_action=gpt_suggested_action.value,
-                reason=data.get("reason"),
-                message_id=message.context.message_id,
-            )
-            return None
-
-        logger.info(
-            "chatgpt_violation",
-            rule_code=rule.rule_id,
-            category=category,
-            configured_action=rule.action.value,
-            message_id=message.context.message_id,
-        )
-        return ModerationVerdict(
-            layer=self.layer_type,
-            rule_code=rule.rule_id,
-            priority=rule.priority,
-            action=rule.action,
-            reason=data.get("reason") or rule.description,
-            violated=True,
-            details={
-                "raw": data,
-                "total_tokens": completion.tokens,
-                "prompt_tokens": completion.prompt_tokens,
-                "completion_tokens": completion.completion_tokens,
-                "gpt_severity": severity,
-                **(
-                    {"action_duration_seconds": rule.action_duration_seconds}
-                    if rule.action_duration_seconds is not None
-                    else {}
-                ),
-            },
+        return (
+            data,
+            completion.tokens,
+            completion.prompt_tokens,
+            completion.completion_tokens,
         )
 
     def _extract_json(self, content: str) -> dict:
@@ -190,25 +303,24 @@ class ChatGPTLayer(ModerationLayer):
         if not stripped:
             raise json.JSONDecodeError("Empty response after stripping", stripped, 0)
         try:
-            return json.loads(stripped.strip("` \n"))
+            return _json_loads(stripped.strip("` \n"))
         except json.JSONDecodeError:
             pass
-        start = stripped.find("{")
-        end = stripped.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            snippet = stripped[start : end + 1]
-            return json.loads(snippet)
+        match = _JSON_OBJ_RE.search(stripped)
+        if match:
+            return _json_loads(match.group(0))
         raise json.JSONDecodeError("No JSON object found in response", stripped, 0)
 
-    async def _resolve_rule(self, category: str, *, chat_id: Optional[int]) -> Optional[ModerationRule]:
-        rules = await self._rules.get_rules_for_layer(LayerType.CHATGPT, chat_id=chat_id)
-        logger.debug(
-            "chatgpt_available_rules",
-            chat_id=chat_id,
-            total_rules=len(rules),
-            rules_categories=[r.category for r in rules if r.category],
-            searching_for=category,
-        )
+    def _resolve_rule(
+        self, category: str, rules: tuple[ModerationRule, ...]
+    ) -> Optional[ModerationRule]:
+        if debug_enabled():
+            logger.debug(
+                "chatgpt_available_rules",
+                total_rules=len(rules),
+                rules_categories=[r.category for r in rules if r.category],
+                searching_for=category,
+            )
         best: Optional[ModerationRule] = None
         for rule in rules:
             match = False
@@ -226,39 +338,22 @@ class ChatGPTLayer(ModerationLayer):
         return best
 
     def _priority_from_severity(self, severity: str) -> ViolationPriority:
-        mapping = {
-            "threats": ViolationPriority.THREATS,
-            "nsfw": ViolationPriority.NSFW,
-            "hate": ViolationPriority.HATE,
-            "spam": ViolationPriority.SPAM,
-        }
-        return mapping.get(severity, ViolationPriority.OTHER)
+        return _SEVERITY_MAP.get(severity, ViolationPriority.OTHER)
 
     def _action_from_payload(self, action: str) -> ActionType:
         if not action:
             return ActionType.WARN
-        normalized = action.strip().lower()
-        synonyms = {
-            "delete_message": "delete",
-            "remove_message": "delete",
-            "remove": "delete",
-            "kick": "ban",
-            "ban_user": "ban",
-            "no_action": "none",
-            "none": "none",
-        }
-        normalized = synonyms.get(normalized, normalized)
-        try:
-            return ActionType(normalized)
-        except ValueError:
+        resolved = _ACTION_MAP.get(action.strip().lower())
+        if resolved is None:
             logger.warning("chatgpt_unknown_action", action=action)
             return ActionType.WARN
+        return resolved
 
     def _build_user_payload(
         self,
         message: MessageEnvelope,
         *,
-        available_rules: Optional[list[ModerationRule]] = None,
+        rules_block: Optional[str] = None,
     ) -> str:
         context_parts = [
             f"chat_id: {message.context.chat_id}",
@@ -272,26 +367,8 @@ class ChatGPTLayer(ModerationLayer):
             "Moderation context:",
             *context_parts,
         ]
-        if available_rules:
-            lines.extend(["", "Active moderation rules (category — action — description):"])
-            sorted_rules = sorted(
-                available_rules,
-                key=lambda rule: (rule.category or "", rule.action.value),
-            )
-            for rule in sorted_rules:
-                lines.append(
-                    f"- {rule.category} — {rule.action.value} — {rule.description or 'no description'}"
-                )
-            categories = ", ".join(
-                sorted({rule.category for rule in available_rules if rule.category}, key=str.lower)
-            )
-            lines.extend(
-                [
-                    "",
-                    "Allowed categories (use one only if the message clearly violates the matching rule):",
-                    categories,
-                ]
-            )
+        if rules_block:
+            lines.extend(["", rules_block])
         lines.extend(["", "Message:", message.content_text() or "<empty>"])
         if message.images:
             lines.extend(
@@ -301,3 +378,46 @@ class ChatGPTLayer(ModerationLayer):
                 ]
             )
         return "\n".join(lines)
+
+    def _rules_block(
+        self,
+        available_rules: tuple[ModerationRule, ...],
+        *,
+        chat_id: Optional[int],
+    ) -> Optional[str]:
+        version = self._rules.version
+        key = (chat_id, version)
+        if key in self._rules_block_cache:
+            return self._rules_block_cache[key]
+        if self._rules_block_version != version:
+            self._rules_block_cache.clear()
+            self._rules_block_version = version
+
+        categorized = [rule for rule in available_rules if rule.category]
+        rendered = self._render_rules_block(categorized) if categorized else None
+        self._rules_block_cache[key] = rendered
+        return rendered
+
+    def _render_rules_block(self, available_rules: list[ModerationRule]) -> str:
+        # Only runs on cache misses, so the sort and set build amortize to
+        # nothing across messages with a stable rule set.
+        lines = ["Active moderation rules (category — action — description):"]
+        sorted_rules = sorted(
+            available_rules,
+            key=lambda rule: (rule.category or "", rule.action.value),
+        )
+        for rule in sorted_rules:
+            lines.append(
+                f"- {rule.category} — {rule.action.value} — {rule.description or 'no description'}"
+            )
+        categories = ", ".join(
+            sorted({rule.category for rule in available_rules if rule.category}, key=str.lower)
+        )
+        lines.extend(
+            [
+                "",
+                "Allowed categories (use one only if the message clearly violates the matching rule):",
+                categories,
+            ]
+        )
+        return "\n".join(lines)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Awaitable, Callable, Optional
+from typing import Awaitable, Callable, Optional, Sequence
 
 import structlog
 
@@ -15,7 +15,7 @@ from ...models import (
     ViolationPriority,
 )
 from ...rules.registry import RuleRegistry
-from ..layers.base import ModerationLayer
+from ..layers.base import MIN_ANALYZABLE_TEXT_LENGTH, ModerationLayer
 
 logger = structlog.get_logger(__name__)
 
@@ -35,41 +35,77 @@ class OmniModerationLayer(ModerationLayer):
         self._rules = rules
         self._semaphore = asyncio.Semaphore(concurrency_limit)
 
+    async def prefetch_batch(self, messages: Sequence[MessageEnvelope]) -> None:
+        """Warm the moderation cache with one grouped /moderations request.
+
+        Packing the batch's unique texts into array inputs amortizes the HTTP
+        round-trip; the per-message evaluate calls then resolve from cache.
+        """
+        texts: list[str] = []
+        seen: set[str] = set()
+        for message in messages:
+            text = message.content_text()
+            if not text or len(text.strip()) < MIN_ANALYZABLE_TEXT_LENGTH:
+                continue
+            if text in seen:
+                continue
+            seen.add(text)
+            texts.append(text)
+        if len(texts) < 2:
+            return
+        async with self._semaphore:
+            try:
+                await self._client.classify_batch(texts)
+            except OpenAIAdapterError as exc:
+                # Prefetch is purely a cache warm; evaluate retries per message.
+                logger.warning("omni_prefetch_failed", error=str(exc), size=len(texts))
+
     async def evaluate(self, message: MessageEnvelope) -> ModerationVerdict | None:
         text = message.content_text()
         image_urls = message.images or message.metadata.get("image_urls", [])
         message_id = message.context.message_id
 
-        if text:
-            result = await self._invoke(lambda: self._client.classify(text), message_id=message_id)
-            verdict = await self._build_verdict(
-                result,
-                message=message,
-                source="text",
-                extra_details={"text_excerpt": text[:120]},
-            )
-            if verdict:
-                return verdict
+        if text and len(text.strip()) < MIN_ANALYZABLE_TEXT_LENGTH:
+            logger.debug("omni_skip_short_text", message_id=message_id)
+            text = ""
 
+        sources: list[tuple[str, dict]] = []
+        calls = []
+        if text:
+            sources.append(("text", {"text_excerpt": text[:120]}))
+            calls.append(self._invoke(lambda: self._client.classify(text), message_id=message_id))
         for image_url in image_urls:
-            logger.debug("omni_image_check", message_id=message_id, image_url=image_url)
-            result = await self._invoke(
-                lambda url=image_url: self._client.classify_image(url),
-                message_id=message_id,
+            sources.append(("image", {"image_reference": image_url}))
+            calls.append(
+                self._invoke(
+                    lambda url=image_url: self._client.classify_image(url),
+                    message_id=message_id,
+                )
             )
+
+        if not calls:
+            logger.debug("omni_skip_no_text", message_id=message_id)
+            return None
+
+        # Classify text and images concurrently; the semaphore inside _invoke
+        # keeps the request fan-out bounded. Verdicts are still resolved in
+        # submission order (text first, then images).
+        results = await asyncio.gather(*calls)
+        if any(result is None for result in results):
+            # A failed classification is indistinguishable from a clean one
+            # downstream; flag it so the verdict is not cached as clean.
+            message.metadata["evaluation_error"] = True
+        for (source, extra_details), result in zip(sources, results):
             verdict = await self._build_verdict(
                 result,
                 message=message,
-                source="image",
-                extra_details={"image_reference": image_url},
+                source=source,
+                extra_details=extra_details,
             )
             if verdict:
                 return verdict
 
-        if not text and not image_urls:
-            logger.debug("omni_skip_no_text", message_id=message_id)
-        else:
-            logger.debug("omni_not_flagged", message_id=message_id)
+        logger.debug("omni_not_flagged", message_id=message_id)
         return None
 
     async def _build_verdict(
@@ -101,6 +137,9 @@ class OmniModerationLayer(ModerationLayer):
             message_id=message.context.message_id,
             source=source,
         )
+        details["matched_category"] = rule.category
+        if rule.action_duration_seconds is not None:
+            details["action_duration_seconds"] = rule.action_duration_seconds
         return ModerationVerdict(
             layer=self.layer_type,
             rule_code=rule.rule_id,
@@ -108,15 +147,7 @@ class OmniModerationLayer(ModerationLayer):
             action=rule.action,
             reason=rule.description,
             violated=True,
-            details={
-                **details,
-                "matched_category": rule.category,
-                **(
-                    {"action_duration_seconds": rule.action_duration_seconds}
-                    if rule.action_duration_seconds is not None
-                    else {}
-                ),
-            },
+            details=details,
         )
 
     async def _invoke(
@@ -134,10 +165,10 @@ class OmniModerationLayer(ModerationLayer):
                 return None
 
     async def _select_rule(self, categories: set[str], *, chat_id: Optional[int]) -> Optional[ModerationRule]:
-        rules = await self._rules.get_rules_for_layer(LayerType.OMNI, chat_id=chat_id)
-        best: Optional = None
-        for rule in rules:
-            if rule.category and rule.category in categories:
-                if best is None or rule.priority > best.priority:
-                    best = rule
+        index = await self._rules.get_category_index(LayerType.OMNI, chat_id=chat_id)
+        best: Optional[ModerationRule] = None
+        for category in categories:
+            rule = index.get(category)
+            if rule and (best is None or rule.priority > best.priority):
+                best = rule
         return best
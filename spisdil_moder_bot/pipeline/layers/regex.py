@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from functools import partial
+from functools import lru_cache, partial
 from typing import Optional
 
 import structlog
@@ -25,39 +25,75 @@ from ...rules.registry import RuleRegistry
 logger = structlog.get_logger(__name__)
 
 
+# Module-level lru_cache instead of per-instance dicts: the matcher runs in
+# executor threads, and the GIL-protected cache is safe to share across them.
+# Failed compiles are cached as None so they are reported once, not per call.
+@lru_cache(maxsize=4096)
+def _compile_pattern(pattern: str) -> Optional[regex_lib.Pattern]:
+    try:
+        return regex_lib.compile(pattern, regex_lib.IGNORECASE | regex_lib.MULTILINE)
+    except Exception as exc:
+        logger.error(
+            "regex_compile_failed",
+            pattern=pattern,
+            backend=_REGEX_BACKEND,
+            error=str(exc),
+        )
+        return None
+
+
+# Numbered backreferences (\1), named backreferences ((?P=name)) and group
+# conditionals ((?(1)...)) resolve against the pattern's own group layout,
+# which the (?P<gN>...) fusion wrappers silently renumber. Patterns matching
+# this must be matched individually, never fused.
+_BACKREF_RE = _regex_module.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+@lru_cache(maxsize=256)
+def _compile_fused(signature: tuple[str, ...]) -> Optional[regex_lib.Pattern]:
+    # Rule ids are UUIDs and not valid group names, so alternatives are
+    # tagged positionally (g0, g1, ...).
+    source = "|".join(f"(?P<g{i}>{pattern})" for i, pattern in enumerate(signature))
+    try:
+        return regex_lib.compile(source, regex_lib.IGNORECASE | regex_lib.MULTILINE)
+    except Exception as exc:
+        logger.warning(
+            "regex_fuse_failed",
+            patterns=len(signature),
+            backend=_REGEX_BACKEND,
+            error=str(exc),
+        )
+        return None
+
+
 class RegexLayer(ModerationLayer, WarmupCapable):
     layer_type = LayerType.REGEX
 
+    _INLINE_TEXT_LIMIT = 4096
+    _INLINE_RULE_LIMIT = 32
+
     def __init__(self, rules: RuleRegistry, *, max_workers: int = 4) -> None:
         super().__init__(priority=10)
         self._rules = rules
         self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="regex-layer")
-        self._compiled: dict[str, Optional[regex_lib.Pattern]] = {}
-        self._lock = asyncio.Lock()
 
     async def warmup(self) -> None:
         rules = await self._rules.get_rules_for_layer(LayerType.REGEX)
-        for rule in rules:
-            if rule.pattern:
-                await run_blocking(self._compile_rule, rule)
+        patterns = tuple(rule.pattern for rule in rules if rule.pattern)
+        if patterns:
+            fusable = tuple(
+                pattern for pattern in patterns if not _BACKREF_RE.search(pattern)
+            )
+            if fusable:
+                await run_blocking(_compile_fused, fusable)
+            for pattern in patterns:
+                await run_blocking(_compile_pattern, pattern)
         logger.info("regex_layer_warmup_completed", rules=len(rules))
 
-    def _compile_rule(self, rule: ModerationRule) -> None:
-        if not rule.pattern or rule.rule_id in self._compiled:
-            return
-        try:
-            compiled = regex_lib.compile(rule.pattern, regex_lib.IGNORECASE | regex_lib.MULTILINE)
-        except Exception as exc:
-            logger.error(
-                "regex_compile_failed",
-                rule_id=rule.rule_id,
-                pattern=rule.pattern,
-                backend=_REGEX_BACKEND,
-                error=str(exc),
-            )
-            self._compiled[rule.rule_id] = None
-            return
-        self._compiled[rule.rule_id] = compiled
+    async def prewarm_pattern(self, pattern: str) -> None:
+        # Called at rule-add time so the first message after a rule change
+        # finds the pattern already in the compile cache.
+        await run_blocking(_compile_pattern, pattern)
 
     async def evaluate(self, message: MessageEnvelope) -> ModerationVerdict | None:
         text = message.content_text()
@@ -73,14 +109,14 @@ class RegexLayer(ModerationLayer, WarmupCapable):
             logger.debug("regex_skip_no_rules")
             return None
 
-        for rule in rules:
-            if not rule.pattern:
-                continue
-            await run_blocking(self._compile_rule, rule)
-
-        loop = asyncio.get_running_loop()
-        match_rule = partial(self._match_rules, text=text)
-        match = await loop.run_in_executor(self._executor, match_rule, rules)
+        # For short texts the executor hop costs more than the match itself;
+        # run inline and offload only payloads big enough to amortize it.
+        if len(text) < self._INLINE_TEXT_LIMIT and len(rules) < self._INLINE_RULE_LIMIT:
+            match = self._match_rules(rules, text=text)
+        else:
+            loop = asyncio.get_running_loop()
+            match_rule = partial(self._match_rules, text=text)
+            match = await loop.run_in_executor(self._executor, match_rule, rules)
         if match is None:
             logger.debug("regex_no_match", message_id=message.context.message_id)
             return None
@@ -91,6 +127,9 @@ class RegexLayer(ModerationLayer, WarmupCapable):
             message_id=message.context.message_id,
             user_id=message.context.user_id,
         )
+        details = {"matched": matched_text, "pattern": rule.pattern}
+        if rule.action_duration_seconds is not None:
+            details["action_duration_seconds"] = rule.action_duration_seconds
         return ModerationVerdict(
             layer=self.layer_type,
             rule_code=rule.rule_id,
@@ -98,22 +137,39 @@ class RegexLayer(ModerationLayer, WarmupCapable):
             action=rule.action,
             reason=rule.description,
             violated=True,
-            details={
-                "matched": matched_text,
-                "pattern": rule.pattern,
-                **(
-                    {"action_duration_seconds": rule.action_duration_seconds}
-                    if rule.action_duration_seconds is not None
-                    else {}
-                ),
-            },
+            details=details,
         )
 
     def _match_rules(
         self, rules: list[ModerationRule], *, text: str
     ) -> Optional[tuple[ModerationRule, str]]:
-        for rule in rules:
-            pattern = self._compiled.get(rule.rule_id)
+        # Runs in the worker thread; compiles lazily on cache miss.
+        candidates = [rule for rule in rules if rule.pattern]
+        if not candidates:
+            return None
+
+        # Backreferencing patterns would break inside the fused alternation;
+        # they fall through to the per-rule loop below.
+        fusable: list[ModerationRule] = []
+        solo: list[ModerationRule] = []
+        for rule in candidates:
+            (solo if _BACKREF_RE.search(rule.pattern) else fusable).append(rule)
+
+        # One fused scan instead of N; note this yields the leftmost match in
+        # the text rather than the first rule in registry order.
+        if fusable:
+            fused = _compile_fused(tuple(rule.pattern for rule in fusable))
+            if fused is None:
+                solo = candidates
+            else:
+                match = fused.search(text)
+                if match is not None:
+                    for index, rule in enumerate(fusable):
+                        if match.group(f"g{index}") is not None:
+                            return rule, match.group(0)
+
+        for rule in solo:
+            pattern = _compile_pattern(rule.pattern)
             if not pattern:
                 continue
             match = pattern.search(text)
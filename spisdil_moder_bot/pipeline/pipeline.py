@@ -6,28 +6,53 @@ from typing import Iterable, Sequence
 import structlog
 
 from ..batching.batcher import MessageBatch
-from ..models import LayerType, MessageEnvelope, ModerationResult
+from ..models import LayerType, MessageEnvelope, ModerationResult, ModerationVerdict
 from .layers.base import ModerationLayer, WarmupCapable
 
 logger = structlog.get_logger(__name__)
 
 
 class ModerationPipeline:
-    def __init__(self, layers: Iterable[ModerationLayer]) -> None:
+    def __init__(
+        self,
+        layers: Iterable[ModerationLayer],
+        *,
+        max_concurrent_messages: int = 16,
+    ) -> None:
         ordered = sorted(layers)
+        self._batch_semaphore = asyncio.Semaphore(max_concurrent_messages)
         self.layers: Sequence[ModerationLayer] = tuple(ordered)
+        self._warmup_layers = tuple(
+            layer for layer in self.layers if isinstance(layer, WarmupCapable)
+        )
+        # Enabled-layer tuples per disabled set; the domain is the handful of
+        # LayerType subsets, so the cache stays tiny.
+        self._enabled_cache: dict[frozenset[LayerType], tuple[ModerationLayer, ...]] = {}
+        self._layer_types = tuple(layer.layer_type for layer in self.layers)
         logger.info(
             "pipeline_initialized",
-            layers=[layer.layer_type.value for layer in self.layers],
+            layers=[layer_type.value for layer_type in self._layer_types],
         )
 
     async def warmup(self) -> None:
         logger.info("pipeline_warmup_start")
-        await asyncio.gather(
-            *(layer.warmup() for layer in self.layers if isinstance(layer, WarmupCapable))
-        )
+        await asyncio.gather(*(layer.warmup() for layer in self._warmup_layers))
         logger.info("pipeline_warmup_complete")
 
+    def _enabled_layers(
+        self, disabled_layers: set[LayerType] | None
+    ) -> tuple[ModerationLayer, ...]:
+        if not disabled_layers:
+            return self.layers
+        key = frozenset(disabled_layers)
+        enabled = self._enabled_cache.get(key)
+        if enabled is None:
+            enabled = tuple(
+                layer for layer in self.layers if layer.layer_type not in key
+            )
+            self._enabled_cache[key] = enabled
+        return enabled
+
     async def process_message(
         self,
         message: MessageEnvelope,
@@ -39,10 +64,22 @@ class ModerationPipeline:
             message_id=message.context.message_id,
             chat_id=message.context.chat_id,
         )
-        evaluated: list[LayerType] = []
-        for layer in self.layers:
-            if disabled_layers and layer.layer_type in disabled_layers:
-                logger.debug("layer_skipped", layer=layer.layer_type.value, reason="disabled")
+        return await self._run_layers(message, self._enabled_layers(disabled_layers))
+
+    async def _run_layers(
+        self,
+        message: MessageEnvelope,
+        layers: Sequence[ModerationLayer],
+        *,
+        evaluated: list[LayerType] | None = None,
+        best_verdict: ModerationVerdict | None = None,
+    ) -> ModerationResult:
+        evaluated = evaluated if evaluated is not None else []
+        for layer in layers:
+            if not layer.should_run(best_verdict):
+                logger.debug(
+                    "layer_skipped", layer=layer.layer_type.value, reason="outcome_decided"
+                )
                 continue
             evaluated.append(layer.layer_type)
             verdict = await layer.evaluate(message)
@@ -62,12 +99,15 @@ class ModerationPipeline:
                     action=verdict.action.value,
                 )
                 return result
+            if verdict and verdict.violated:
+                if best_verdict is None or verdict.priority > best_verdict.priority:
+                    best_verdict = verdict
         logger.debug(
             "pipeline_message_clean",
             message_id=message.context.message_id,
             evaluated=[layer.value for layer in evaluated],
         )
-        return ModerationResult(message=message, verdict=None, evaluated_layers=evaluated)
+        return ModerationResult(message=message, verdict=best_verdict, evaluated_layers=evaluated)
 
     async def process_batch(
         self,
@@ -80,9 +120,66 @@ class ModerationPipeline:
             size=len(batch.items),
             reason=batch.flush_reason,
         )
-        results = await asyncio.gather(
-            *(self.process_message(item, disabled_layers=disabled_layers) for item in batch.items)
-        )
+        enabled = self._enabled_layers(disabled_layers)
+        items = batch.items
+        if not enabled:
+            # Every layer is paused; skip prefetch and task fan-out entirely.
+            logger.info("pipeline_all_layers_disabled", size=len(items))
+            return [
+                ModerationResult(message=item, verdict=None, evaluated_layers=[])
+                for item in items
+            ]
+        slots: list[ModerationResult | None] = [None] * len(items)
+        pending: list[tuple[int, MessageEnvelope, ModerationVerdict | None]] = []
+        rest: Sequence[ModerationLayer] = enabled
+
+        # Early regex pass: the first layer is cheap local matching, so run it
+        # over the whole batch up front and drop decided items before any
+        # OpenAI prefetch or fan-out happens.
+        if len(items) > 1 and enabled and enabled[0].layer_type is LayerType.REGEX:
+            first, rest = enabled[0], enabled[1:]
+            verdicts = await asyncio.gather(*(first.evaluate(item) for item in items))
+            for index, (item, verdict) in enumerate(zip(items, verdicts)):
+                if verdict and verdict.short_circuit():
+                    logger.info(
+                        "pipeline_message_violation",
+                        message_id=item.context.message_id,
+                        layer=verdict.layer.value,
+                        rule=verdict.rule_code,
+                        action=verdict.action.value,
+                    )
+                    slots[index] = ModerationResult(
+                        message=item, verdict=verdict, evaluated_layers=[first.layer_type]
+                    )
+                else:
+                    pending.append(
+                        (index, item, verdict if verdict and verdict.violated else None)
+                    )
+        else:
+            pending = [(index, item, None) for index, item in enumerate(items)]
+
+        if len(pending) > 1:
+            pending_messages = [item for _, item, _ in pending]
+            await asyncio.gather(*(layer.prefetch_batch(pending_messages) for layer in rest))
+
+        async def process_bounded(
+            item: MessageEnvelope, verdict: ModerationVerdict | None
+        ) -> ModerationResult:
+            # Without a batch-level bound a large flush would fan out every
+            # message at once and pile up inside the layer semaphores.
+            async with self._batch_semaphore:
+                evaluated = [enabled[0].layer_type] if rest is not enabled else []
+                return await self._run_layers(
+                    item, rest, evaluated=evaluated, best_verdict=verdict
+                )
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(process_bounded(item, verdict)) for _, item, verdict in pending
+            ]
+        for (index, _, _), task in zip(pending, tasks):
+            slots[index] = task.result()
+        results = [result for result in slots if result is not None]
         violations = sum(1 for result in results if result.verdict and result.verdict.violated)
         logger.info(
             "pipeline_process_batch_complete",
@@ -30,16 +30,20 @@ class PunishmentDecision:
 class PunishmentAggregator:
     def decide(self, results: Iterable[ModerationResult]) -> Optional[PunishmentDecision]:
         best: Optional[ModerationVerdict] = None
+        best_key = (0, 0)
         conflicts: list[ModerationVerdict] = []
 
         for result in results:
             verdict = result.verdict
             if not verdict or not verdict.violated:
                 continue
-            if best is None or self._is_better(verdict, best):
+            # Ranking key computed once per verdict instead of per comparison.
+            key = (LAYER_RANK.get(verdict.layer, 0), int(verdict.priority))
+            if best is None or key > best_key:
                 if best is not None:
                     conflicts.append(best)
                 best = verdict
+                best_key = key
             else:
                 conflicts.append(verdict)
 
@@ -56,13 +60,27 @@ class PunishmentAggregator:
         )
         return PunishmentDecision(verdict=best, conflicting=conflicts)
 
-    def _is_better(self, candidate: ModerationVerdict, current: ModerationVerdict) -> bool:
-        candidate_rank = (
-            LAYER_RANK.get(candidate.layer, 0),
-            int(candidate.priority),
-        )
-        current_rank = (
-            LAYER_RANK.get(current.layer, 0),
-            int(current.priority),
-        )
-        return candidate_rank > current_rank
+    def decide_bulk(
+        self, results: Iterable[ModerationResult]
+    ) -> list[Optional[PunishmentDecision]]:
+        """Decide each result independently in one sweep.
+
+        Results come from different messages, so there is no cross-result
+        aggregation; this avoids a single-element list allocation per result.
+        """
+        decisions: list[Optional[PunishmentDecision]] = []
+        for result in results:
+            verdict = result.verdict
+            if not verdict or not verdict.violated:
+                decisions.append(None)
+                continue
+            logger.info(
+                "punishment_decision",
+                action=verdict.action.value,
+                rule=verdict.rule_code,
+                layer=verdict.layer.value,
+                priority=int(verdict.priority),
+                conflicts=0,
+            )
+            decisions.append(PunishmentDecision(verdict=verdict, conflicting=[]))
+        return decisions
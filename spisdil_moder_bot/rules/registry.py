@@ -12,19 +12,78 @@ logger = structlog.get_logger(__name__)
 
 
 class RuleRegistry:
-    """In-memory cache for active moderation rules grouped by layer."""
+    """In-memory cache for active moderation rules grouped by layer.
+
+    Reads vastly outnumber writes, so lookups are served lock-free from an
+    immutable snapshot that mutations rebuild and atomically rebind.
+    """
 
     def __init__(self) -> None:
         self._rules: dict[LayerType, dict[Optional[int], list[ModerationRule]]] = defaultdict(
             lambda: defaultdict(list)
         )
+        self._snapshot: dict[tuple[LayerType, Optional[int]], tuple[ModerationRule, ...]] = {}
+        self._all_rules: tuple[ModerationRule, ...] = ()
+        self._global_rules: tuple[ModerationRule, ...] = ()
+        self._by_chat: dict[int, tuple[ModerationRule, ...]] = {}
+        self._category_index: dict[tuple[LayerType, Optional[int]], dict[str, ModerationRule]] = {}
+        self._version = 0
         self._lock = asyncio.Lock()
 
+    @property
+    def version(self) -> int:
+        """Monotonic counter bumped on every write; lets callers cache derived data."""
+        return self._version
+
+    def _rebuild_snapshot(self) -> None:
+        # Global rules are pre-concatenated into every chat entry so a read is
+        # a single dict lookup returning a shared tuple.
+        snapshot: dict[tuple[LayerType, Optional[int]], tuple[ModerationRule, ...]] = {}
+        for layer, by_chat in self._rules.items():
+            global_rules = tuple(by_chat.get(None, ()))
+            snapshot[(layer, None)] = global_rules
+            for chat_id, rules in by_chat.items():
+                if chat_id is not None:
+                    snapshot[(layer, chat_id)] = global_rules + tuple(rules)
+        # Inverted index: category -> its highest-priority rule, so flagged
+        # categories resolve with dict lookups instead of linear scans.
+        category_index: dict[tuple[LayerType, Optional[int]], dict[str, ModerationRule]] = {}
+        for key, combined in snapshot.items():
+            by_category: dict[str, ModerationRule] = {}
+            for rule in combined:
+                if not rule.category:
+                    continue
+                current = by_category.get(rule.category)
+                if current is None or rule.priority > current.priority:
+                    by_category[rule.category] = rule
+            category_index[key] = by_category
+        self._snapshot = snapshot
+        self._category_index = category_index
+        all_rules = tuple(
+            rule for by_chat in self._rules.values() for rules in by_chat.values() for rule in rules
+        )
+        # Per-chat index with globals pre-concatenated, mirroring the layer
+        # snapshot, so chat-scoped listings are a single dict lookup.
+        chat_lists: dict[int, list[ModerationRule]] = {}
+        global_rules: list[ModerationRule] = []
+        for rule in all_rules:
+            if rule.chat_id is None:
+                global_rules.append(rule)
+            else:
+                chat_lists.setdefault(rule.chat_id, []).append(rule)
+        self._global_rules = tuple(global_rules)
+        self._by_chat = {
+            chat_id: self._global_rules + tuple(rules) for chat_id, rules in chat_lists.items()
+        }
+        self._all_rules = all_rules
+        self._version += 1
+
     async def seed(self, rules: Iterable[ModerationRule]) -> None:
         async with self._lock:
             self._rules.clear()
             for rule in rules:
                 self._rules[rule.layer][rule.chat_id].append(rule)
+            self._rebuild_snapshot()
         logger.info(
             "rule_registry_seeded",
             totals={
@@ -36,6 +95,7 @@ class RuleRegistry:
     async def add_rule(self, rule: ModerationRule) -> None:
         async with self._lock:
             self._rules[rule.layer][rule.chat_id].append(rule)
+            self._rebuild_snapshot()
         logger.info(
             "rule_registry_added",
             rule_id=rule.rule_id,
@@ -52,12 +112,34 @@ class RuleRegistry:
                         by_chat[chat_id] = filtered
                     else:
                         by_chat.pop(chat_id, None)
+            self._rebuild_snapshot()
         logger.info("rule_registry_removed", rule_id=rule_id)
 
-    async def get_rules_for_layer(self, layer: LayerType, chat_id: Optional[int] = None) -> list[ModerationRule]:
-        async with self._lock:
-            layer_rules = self._rules.get(layer, {})
-            combined: list[ModerationRule] = list(layer_rules.get(None, []))
-            if chat_id is not None:
-                combined.extend(layer_rules.get(chat_id, []))
-            return combined
+    def snapshot(self, chat_id: Optional[int] = None) -> list[ModerationRule]:
+        """Return the current rule set without touching storage.
+
+        With a ``chat_id`` the list is narrowed to global rules plus that
+        chat's own; without one every rule is returned.
+        """
+        if chat_id is None:
+            return list(self._all_rules)
+        rules = self._by_chat.get(chat_id)
+        return list(rules) if rules is not None else list(self._global_rules)
+
+    async def get_rules_for_layer(
+        self, layer: LayerType, chat_id: Optional[int] = None
+    ) -> tuple[ModerationRule, ...]:
+        snapshot = self._snapshot
+        rules = snapshot.get((layer, chat_id))
+        if rules is None and chat_id is not None:
+            rules = snapshot.get((layer, None))
+        return rules or ()
+
+    async def get_category_index(
+        self, layer: LayerType, chat_id: Optional[int] = None
+    ) -> dict[str, ModerationRule]:
+        index = self._category_index
+        by_category = index.get((layer, chat_id))
+        if by_category is None and chat_id is not None:
+            by_category = index.get((layer, None))
+        return by_category or {}
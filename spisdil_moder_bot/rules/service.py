@@ -1,33 +1,117 @@
 from __future__ import annotations
 
 import asyncio
+import sys
+from bisect import bisect_right
 from typing import Optional
 from uuid import uuid4
 
 import structlog
 
 from ..adapters.openai import RuleSynthesisClient, RuleSynthesisRequest
-from ..models import ActionType, LayerType, ModerationRule, RuleSource, RuleType, ViolationPriority
+from ..logging.events import debug_enabled
+from ..models import (
+    LAYER_BY_VALUE,
+    RULE_TYPE_BY_VALUE,
+    ActionType,
+    LayerType,
+    ModerationRule,
+    RuleSource,
+    RuleType,
+    ViolationPriority,
+)
 from ..storage.base import StorageGateway
 from .registry import RuleRegistry
 
 logger = structlog.get_logger(__name__)
 
 # Valid Omni Moderation API categories (OpenAI omni-moderation-latest, 2025)
-OMNI_VALID_CATEGORIES = {
-    "hate",
-    "hate/threatening",
-    "harassment",
-    "harassment/threatening",
-    "self-harm",
-    "self-harm/intent",
-    "self-harm/instructions",
-    "sexual",
-    "sexual/minors",
-    "violence",
-    "violence/graphic",
-    "illicit",
-    "illicit/violent",
+OMNI_VALID_CATEGORIES = frozenset(
+    sys.intern(category)
+    for category in (
+        "hate",
+        "hate/threatening",
+        "harassment",
+        "harassment/threatening",
+        "self-harm",
+        "self-harm/intent",
+        "self-harm/instructions",
+        "sexual",
+        "sexual/minors",
+        "violence",
+        "violence/graphic",
+        "illicit",
+        "illicit/violent",
+    )
+)
+_OMNI_VALID_SORTED = tuple(sorted(OMNI_VALID_CATEGORIES))
+
+# Classifier priority buckets: scores below 40 are OTHER, then each threshold
+# promotes to the next tier up to THREATS at 90+.
+_PRIORITY_THRESHOLDS = (40, 60, 70, 90)
+_PRIORITY_BY_BUCKET = (
+    ViolationPriority.OTHER,
+    ViolationPriority.SPAM,
+    ViolationPriority.HATE,
+    ViolationPriority.NSFW,
+    ViolationPriority.THREATS,
+)
+
+# Per-layer validation, specialized once at import: each validator takes the
+# resolved fields and returns them possibly rewritten (e.g. demoted to the
+# chatgpt layer when a required field is missing).
+_ResolvedFields = tuple[LayerType, RuleType, Optional[str], Optional[str]]
+
+
+def _validate_api_layer(
+    layer: LayerType, rule_type: RuleType, pattern: Optional[str], category: Optional[str]
+) -> _ResolvedFields:
+    # Omni and ChatGPT layers use only category, not pattern
+    if pattern is not None:
+        logger.warning(
+            "rule_validation_pattern_ignored",
+            layer=layer.value,
+            pattern_removed=pattern[:50],
+            reason=f"{layer.value} layer does not use regex patterns",
+        )
+        pattern = None
+    return layer, rule_type, pattern, category
+
+
+def _validate_omni(
+    layer: LayerType, rule_type: RuleType, pattern: Optional[str], category: Optional[str]
+) -> _ResolvedFields:
+    layer, rule_type, pattern, category = _validate_api_layer(layer, rule_type, pattern, category)
+    # Validate Omni categories against official API list
+    if not category or category not in OMNI_VALID_CATEGORIES:
+        logger.warning(
+            "rule_validation_invalid_omni_category",
+            category=category,
+            valid_categories=_OMNI_VALID_SORTED,
+            reason="Category not supported by Omni Moderation API, falling back to chatgpt layer",
+        )
+        return LayerType.CHATGPT, RuleType.CONTEXTUAL, pattern, category
+    return layer, rule_type, pattern, category
+
+
+def _validate_regex(
+    layer: LayerType, rule_type: RuleType, pattern: Optional[str], category: Optional[str]
+) -> _ResolvedFields:
+    # Regex layer requires pattern
+    if not pattern:
+        logger.warning(
+            "rule_validation_missing_pattern",
+            layer=layer.value,
+            reason="regex layer requires pattern, falling back to chatgpt layer",
+        )
+        return LayerType.CHATGPT, RuleType.CONTEXTUAL, pattern, category
+    return layer, rule_type, pattern, category
+
+
+_VALIDATORS = {
+    LayerType.REGEX: _validate_regex,
+    LayerType.OMNI: _validate_omni,
+    LayerType.CHATGPT: _validate_api_layer,
 }
 
 
@@ -41,7 +125,9 @@ class RuleService:
         self._registry = registry
         self._storage = storage
         self._synthesizer = synthesizer
-        self._lock = asyncio.Lock()
+        # Striped per-chat locks: additions in unrelated chats proceed
+        # concurrently while writes for the same chat stay serialized.
+        self._locks = [asyncio.Lock() for _ in range(16)]
 
     async def bootstrap(self) -> None:
         rules = await self._storage.list_rules()
@@ -61,25 +147,40 @@ class RuleService:
         pattern: Optional[str] = None,
         category: Optional[str] = None,
     ) -> ModerationRule:
-        async with self._lock:
-            logger.info(
-                "rule_add_requested",
-                source=source,
-                action=desired_action.value,
-                chat_id=chat_id,
-                duration=action_duration_seconds,
-                layer_override=layer.value if layer else None,
-                rule_type_override=rule_type.value if rule_type else None,
-            )
-            classification = None
-            if layer is None or rule_type is None or pattern is None or category is None:
-                classification = await self._synthesizer.classify_rule(
-                    RuleSynthesisRequest(
-                        rule_text=description,
-                        source=source,
-                        desired_action=desired_action.value,
-                    )
+        logger.info(
+            "rule_add_requested",
+            source=source,
+            action=desired_action.value,
+            chat_id=chat_id,
+            duration=action_duration_seconds,
+            layer_override=layer.value if layer else None,
+            rule_type_override=rule_type.value if rule_type else None,
+        )
+        # Classification and validation touch no shared state, so the slow
+        # OpenAI round-trip stays outside the lock.
+        #
+        # Only classify when a field the layer actually needs is missing:
+        # pattern=None is legitimate for omni/chatgpt rules and category=None
+        # for regex ones, so fully-specified admin rules skip the call. The
+        # chatgpt layer resolves rules by category/aliases too, so a chatgpt
+        # rule without one would never match anything.
+        classification = None
+        needs_classification = (
+            layer is None
+            or rule_type is None
+            or (layer == LayerType.REGEX and pattern is None)
+            or (layer == LayerType.OMNI and category is None)
+            or (layer == LayerType.CHATGPT and category is None)
+        )
+        if needs_classification:
+            classification = await self._synthesizer.classify_rule(
+                RuleSynthesisRequest(
+                    rule_text=description,
+                    source=source,
+                    desired_action=desired_action.value,
                 )
+            )
+            if debug_enabled():
                 logger.debug(
                     "rule_classification_response",
                     layer=classification.layer,
@@ -89,81 +190,52 @@ class RuleService:
                     priority=classification.priority,
                 )
 
-            # Resolve layer and type
-            resolved_layer = layer or self._resolve_layer(classification.layer if classification else "chatgpt")
-            resolved_type = rule_type or self._resolve_type(classification.rule_type if classification else "contextual")
-            resolved_pattern = pattern if pattern is not None else (classification.regex if classification else None)
-            resolved_category = category if category is not None else (classification.category if classification else None)
-
-            # Validate and clean fields based on layer type
-            if resolved_layer in (LayerType.OMNI, LayerType.CHATGPT):
-                # Omni and ChatGPT layers use only category, not pattern
-                if resolved_pattern is not None:
-                    logger.warning(
-                        "rule_validation_pattern_ignored",
-                        layer=resolved_layer.value,
-                        pattern_removed=resolved_pattern[:50] if resolved_pattern else None,
-                        reason=f"{resolved_layer.value} layer does not use regex patterns",
-                    )
-                    resolved_pattern = None
-
-                # Validate Omni categories against official API list
-                if resolved_layer == LayerType.OMNI:
-                    if not resolved_category or resolved_category not in OMNI_VALID_CATEGORIES:
-                        logger.warning(
-                            "rule_validation_invalid_omni_category",
-                            category=resolved_category,
-                            valid_categories=sorted(OMNI_VALID_CATEGORIES),
-                            reason="Category not supported by Omni Moderation API, falling back to chatgpt layer",
-                        )
-                        resolved_layer = LayerType.CHATGPT
-                        resolved_type = RuleType.CONTEXTUAL
-
-            elif resolved_layer == LayerType.REGEX:
-                # Regex layer requires pattern
-                if not resolved_pattern:
-                    logger.warning(
-                        "rule_validation_missing_pattern",
-                        layer=resolved_layer.value,
-                        reason="regex layer requires pattern, falling back to chatgpt layer",
-                    )
-                    resolved_layer = LayerType.CHATGPT
-                    resolved_type = RuleType.CONTEXTUAL
-
-            rule = ModerationRule(
-                rule_id=str(uuid4()),
-                description=description,
-                action=desired_action,
-                source=source,
-                layer=resolved_layer,
-                rule_type=resolved_type,
-                chat_id=chat_id,
-                pattern=resolved_pattern,
-                category=resolved_category,
-                priority=self._resolve_priority(classification.priority if classification else 10),
-                action_duration_seconds=action_duration_seconds,
-                metadata={
-                    "auto_generated": True,
-                    **(
-                        {"action_duration_seconds": action_duration_seconds}
-                        if action_duration_seconds is not None
-                        else {}
-                    ),
-                },
-            )
+        # Resolve layer and type
+        resolved_layer = layer or self._resolve_layer(classification.layer if classification else "chatgpt")
+        resolved_type = rule_type or self._resolve_type(classification.rule_type if classification else "contextual")
+        resolved_pattern = pattern if pattern is not None else (classification.regex if classification else None)
+        resolved_category = category if category is not None else (classification.category if classification else None)
+
+        # Validate and clean fields through the per-layer dispatch table
+        resolved_layer, resolved_type, resolved_pattern, resolved_category = _VALIDATORS[
+            resolved_layer
+        ](resolved_layer, resolved_type, resolved_pattern, resolved_category)
+
+        rule = ModerationRule(
+            rule_id=str(uuid4()),
+            description=description,
+            action=desired_action,
+            source=source,
+            layer=resolved_layer,
+            rule_type=resolved_type,
+            chat_id=chat_id,
+            pattern=resolved_pattern,
+            category=resolved_category,
+            priority=self._resolve_priority(classification.priority if classification else 10),
+            action_duration_seconds=action_duration_seconds,
+            metadata={
+                "auto_generated": True,
+                **(
+                    {"action_duration_seconds": action_duration_seconds}
+                    if action_duration_seconds is not None
+                    else {}
+                ),
+            },
+        )
+        async with self._locks[(chat_id or 0) % len(self._locks)]:
             await self._storage.upsert_rule(rule)
             await self._registry.add_rule(rule)
-            logger.info(
-                "rule_added",
-                rule_id=rule.rule_id,
-                layer=rule.layer.value,
-                rule_type=rule.rule_type.value,
-                category=rule.category,
-                has_pattern=bool(rule.pattern),
-                priority=rule.priority.value,
-                chat_id=chat_id,
-            )
-            return rule
+        logger.info(
+            "rule_added",
+            rule_id=rule.rule_id,
+            layer=rule.layer.value,
+            rule_type=rule.rule_type.value,
+            category=rule.category,
+            has_pattern=bool(rule.pattern),
+            priority=rule.priority.value,
+            chat_id=chat_id,
+        )
+        return rule
 
     async def remove_rule(self, rule_id: str) -> None:
         await self._storage.delete_rule(rule_id)
@@ -171,39 +243,24 @@ class RuleService:
         logger.info("rule_removed", rule_id=rule_id)
 
     async def list_rules(self, chat_id: Optional[int] = None) -> list[ModerationRule]:
-        rules = await self._storage.list_rules()
-        if chat_id is None:
-            return rules
-        return [rule for rule in rules if rule.chat_id in (None, chat_id)]
+        # The registry mirrors storage (bootstrap seeds it, add/remove keep it
+        # in sync), so admin listings are served from memory.
+        return self._registry.snapshot(chat_id)
 
     def _resolve_layer(self, value: str) -> LayerType:
-        try:
-            return LayerType(value)
-        except ValueError:
+        layer = LAYER_BY_VALUE.get(value)
+        if layer is None:
             logger.warning("unknown_layer_from_classifier", layer=value)
-            if value == "omni":
-                return LayerType.OMNI
-            if value == "regex":
-                return LayerType.REGEX
             return LayerType.CHATGPT
+        return layer
 
     def _resolve_type(self, value: str) -> RuleType:
-        try:
-            return RuleType(value)
-        except ValueError:
+        rule_type = RULE_TYPE_BY_VALUE.get(value)
+        if rule_type is None:
             logger.warning("unknown_rule_type_from_classifier", rule_type=value)
             return RuleType.SEMANTIC
+        return rule_type
 
     def _resolve_priority(self, value: int) -> ViolationPriority:
         bounded = max(0, min(100, value))
-        buckets = [
-            (ViolationPriority.THREATS, 90),
-            (ViolationPriority.NSFW, 70),
-            (ViolationPriority.HATE, 60),
-            (ViolationPriority.SPAM, 40),
-            (ViolationPriority.OTHER, 0),
-        ]
-        for priority, threshold in buckets:
-            if bounded >= threshold:
-                return priority
-        return ViolationPriority.OTHER
+        return _PRIORITY_BY_BUCKET[bisect_right(_PRIORITY_THRESHOLDS, bounded)]
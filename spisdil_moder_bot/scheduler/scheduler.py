@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import time
 from typing import Awaitable, Callable, Optional
 
 import structlog
 
 from ..batching.batcher import MessageBatch, MessageBatcher
-from ..models import LayerType, ModerationResult
+from ..logging.events import debug_enabled
+from ..models import LayerType, MessageEnvelope, ModerationResult, ModerationVerdict
 from ..pipeline.pipeline import ModerationPipeline
 from ..punishments.aggregator import PunishmentAggregator, PunishmentDecision
+from ..rules.registry import RuleRegistry
 from ..storage.base import StorageGateway
 
 logger = structlog.get_logger(__name__)
@@ -25,36 +28,98 @@ class ModerationScheduler:
         storage: StorageGateway,
         *,
         aggregator: Optional[PunishmentAggregator] = None,
+        rules: Optional[RuleRegistry] = None,
         max_concurrent_batches: int = 3,
         decision_callback: Optional[DecisionCallback] = None,
+        result_cache_ttl_seconds: float = 3600.0,
     ) -> None:
         self._batcher = batcher
         self._pipeline = pipeline
         self._storage = storage
+        self._rules = rules
+        self._result_cache_ttl = result_cache_ttl_seconds
         self._aggregator = aggregator or PunishmentAggregator()
         self._decision_callback = decision_callback
-        self._semaphore = asyncio.Semaphore(max_concurrent_batches)
-        self._tasks: set[asyncio.Task[None]] = set()
+        self._worker_count = max_concurrent_batches
+        # Bounded hand-off queue between the fetcher and the workers: the next
+        # batch is pulled from the batcher while earlier ones are in flight.
+        # None is the shutdown sentinel; each worker exits on receiving one.
+        self._queue: asyncio.Queue[Optional[MessageBatch]] = asyncio.Queue(
+            maxsize=max_concurrent_batches
+        )
+        self._fetcher: Optional[asyncio.Task[None]] = None
+        self._workers: list[asyncio.Task[None]] = []
+        # Results are persisted by a background writer so SQLite commits stay
+        # off the decision critical path; backlog coalesces into one write.
+        self._write_queue: asyncio.Queue[list[ModerationResult]] = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task[None]] = None
         self._running = False
-        self._disabled_until: dict[LayerType, float] = {}
-        self._main_task: Optional[asyncio.Task[None]] = None
+        # Pause deadlines in monotonic nanoseconds; the active set is cached
+        # as a frozenset and only rebuilt when a deadline passes or changes.
+        self._disabled_until: dict[LayerType, int] = {}
+        self._disabled_cache: frozenset[LayerType] = frozenset()
+        self._next_expiry_ns = 0
 
     async def start(self) -> None:
         if self._running:
             return
         await self._pipeline.warmup()
         self._running = True
-        self._main_task = asyncio.create_task(self._run())
-        logger.info("scheduler_started")
+        # A fixed pool of persistent consumers bounds batch concurrency
+        # without allocating a task (and done-callback bookkeeping) per batch.
+        self._fetcher = asyncio.create_task(self._fetch())
+        self._writer_task = asyncio.create_task(self._writer())
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self._worker_count)
+        ]
+        logger.info("scheduler_started", workers=self._worker_count)
 
     async def stop(self) -> None:
         self._running = False
-        if self._main_task:
-            self._main_task.cancel()
-        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._fetcher:
+            self._fetcher.cancel()
+            await asyncio.gather(self._fetcher, return_exceptions=True)
+            self._fetcher = None
+        # Drain rather than cancel: one sentinel per worker lets each finish
+        # its in-flight batch and whatever is still queued ahead of the
+        # sentinel instead of dropping accepted messages on the floor.
+        for _ in self._workers:
+            await self._queue.put(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._writer_task:
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+        await self._flush_writes()
         logger.info("scheduler_stopped")
 
-    async def _run(self) -> None:
+    async def _writer(self) -> None:
+        while True:
+            buffer = list(await self._write_queue.get())
+            # Coalesce whatever else has queued up so a backlog lands in one
+            # transaction; no linger, so persistence is not delayed when idle.
+            while not self._write_queue.empty():
+                buffer.extend(self._write_queue.get_nowait())
+            try:
+                await self._storage.record_batch_results(buffer)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("result_write_failed", error=str(exc))
+
+    async def _flush_writes(self) -> None:
+        pending: list[ModerationResult] = []
+        while not self._write_queue.empty():
+            pending.extend(self._write_queue.get_nowait())
+        if not pending:
+            return
+        try:
+            await self._storage.record_batch_results(pending)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("result_write_failed", error=str(exc))
+
+    async def _fetch(self) -> None:
+        # Pull the next batch while workers are still busy so batcher-side
+        # coalescing overlaps with upstream HTTP instead of waiting for it.
         while self._running:
             batch = await self._batcher.get()
             logger.info(
@@ -62,33 +127,107 @@ class ModerationScheduler:
                 size=len(batch.items),
                 reason=batch.flush_reason,
             )
-            await self._semaphore.acquire()
-            task = asyncio.create_task(self._process_batch(batch))
-            self._tasks.add(task)
-            task.add_done_callback(lambda t: self._on_task_done(t))
+            await self._queue.put(batch)
 
-    def _on_task_done(self, task: asyncio.Task[None]) -> None:
-        self._tasks.discard(task)
-        self._semaphore.release()
-        if task.exception():
-            logger.error("batch_task_failed", error=str(task.exception()))
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._queue.get()
+            if batch is None:
+                break
+            try:
+                await self._process_batch(batch)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("batch_task_failed", error=str(exc))
 
     async def _process_batch(self, batch: MessageBatch) -> None:
         disabled = self._current_disabled_layers()
-        try:
+        if debug_enabled():
             logger.debug(
                 "scheduler_process_batch",
                 size=len(batch.items),
                 disabled_layers={layer.value for layer in disabled},
             )
-            results = await self._pipeline.process_batch(batch, disabled_layers=disabled)
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.error("batch_processing_failed", error=str(exc))
-            return
 
-        await self._storage.record_batch_results(results)
-        for result in results:
-            decision = self._aggregator.decide([result])
+        # Serve repeats from the persistent verdict cache before spending a
+        # pipeline pass. Disabled layers change the outcome, so caching is
+        # bypassed entirely while any layer is paused.
+        items = batch.items
+        hashes: list[Optional[bytes]] = [
+            self._cache_hash(item) if not disabled else None for item in items
+        ]
+        cached: dict[bytes, dict] = {}
+        wanted = [text_hash for text_hash in hashes if text_hash is not None]
+        if wanted:
+            try:
+                cached = await self._storage.get_cached_results(
+                    wanted, max_age_seconds=self._result_cache_ttl
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("result_cache_lookup_failed", error=str(exc))
+
+        # Identical texts within the batch collapse to one pipeline item; the
+        # verdict fans back out to every originating envelope afterwards.
+        slots: list[Optional[ModerationResult]] = [None] * len(items)
+        pending_items: list[MessageEnvelope] = []
+        pending_slots: list[list[int]] = []
+        group_index: dict[bytes, int] = {}
+        for index, (item, text_hash) in enumerate(zip(items, hashes)):
+            payload = cached.get(text_hash) if text_hash is not None else None
+            if payload is not None:
+                slots[index] = self._result_from_payload(item, payload)
+                continue
+            if text_hash is not None:
+                position = group_index.get(text_hash)
+                if position is not None:
+                    pending_slots[position].append(index)
+                    continue
+                group_index[text_hash] = len(pending_items)
+            pending_items.append(item)
+            pending_slots.append([index])
+        if len(pending_items) < len(items):
+            logger.info(
+                "scheduler_batch_deduplicated",
+                unique=len(pending_items),
+                size=len(items),
+            )
+
+        if pending_items:
+            pending_batch = MessageBatch(
+                items=tuple(pending_items),
+                created_at=batch.created_at,
+                flush_reason=batch.flush_reason,
+            )
+            try:
+                fresh = await self._pipeline.process_batch(pending_batch, disabled_layers=disabled)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("batch_processing_failed", error=str(exc))
+                return
+            entries: list[tuple[bytes, dict]] = []
+            for result, indices in zip(fresh, pending_slots):
+                slots[indices[0]] = result
+                for index in indices[1:]:
+                    slots[index] = ModerationResult(
+                        message=items[index],
+                        verdict=result.verdict,
+                        evaluated_layers=list(result.evaluated_layers),
+                    )
+                text_hash = hashes[indices[0]]
+                # Results whose evaluation hit an API error look clean but
+                # are not; persisting them would serve the failure from the
+                # cache for a full TTL.
+                if text_hash is not None and not result.message.metadata.get("evaluation_error"):
+                    entries.append((text_hash, self._result_payload(result)))
+            if entries:
+                try:
+                    await self._storage.store_cached_results(entries)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error("result_cache_store_failed", error=str(exc))
+
+        results = [result for result in slots if result is not None]
+
+        if results:
+            self._write_queue.put_nowait(results)
+        for decision, result in zip(self._aggregator.decide_bulk(results), results):
             if not decision:
                 continue
             logger.info(
@@ -102,20 +241,64 @@ class ModerationScheduler:
                 except Exception as exc:  # pylint: disable=broad-except
                     logger.error("decision_callback_failed", error=str(exc))
 
-    def _current_disabled_layers(self) -> set[LayerType]:
-        now = time.monotonic()
-        disabled = {layer for layer, until in self._disabled_until.items() if until > now}
-        for layer in list(self._disabled_until):
-            if self._disabled_until[layer] <= now:
-                self._disabled_until.pop(layer, None)
-        return disabled
+    def _cache_hash(self, item: MessageEnvelope) -> Optional[bytes]:
+        # Only plain text is cacheable: image payloads are not keyed here, and
+        # chat-scoped rules make identical text chat-dependent. The registry
+        # version is part of the key so verdicts cached under an old rule set
+        # go stale the moment rules change instead of surviving to TTL.
+        if item.images:
+            return None
+        text = item.content_text()
+        if not text:
+            return None
+        version = self._rules.version if self._rules is not None else 0
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{version}|{item.context.chat_id}|".encode())
+        digest.update(text.encode())
+        return digest.digest()
+
+    @staticmethod
+    def _result_payload(result: ModerationResult) -> dict:
+        return {
+            "verdict": result.verdict.to_payload() if result.verdict else None,
+            "evaluated_layers": [layer.value for layer in result.evaluated_layers],
+        }
+
+    @staticmethod
+    def _result_from_payload(item: MessageEnvelope, payload: dict) -> ModerationResult:
+        verdict_payload = payload.get("verdict")
+        return ModerationResult(
+            message=item,
+            verdict=ModerationVerdict.from_payload(verdict_payload) if verdict_payload else None,
+            evaluated_layers=[LayerType(value) for value in payload.get("evaluated_layers", [])],
+        )
+
+    def _current_disabled_layers(self) -> frozenset[LayerType]:
+        if not self._disabled_until:
+            if self._disabled_cache:
+                self._disabled_cache = frozenset()
+            return self._disabled_cache
+        now = time.monotonic_ns()
+        if now < self._next_expiry_ns:
+            return self._disabled_cache
+        active = {
+            layer: deadline
+            for layer, deadline in self._disabled_until.items()
+            if deadline > now
+        }
+        self._disabled_until = active
+        self._disabled_cache = frozenset(active)
+        self._next_expiry_ns = min(active.values()) if active else 0
+        return self._disabled_cache
 
     def pause_layer(self, layer: LayerType, duration: float) -> None:
-        until = time.monotonic() + duration
+        until = time.monotonic_ns() + int(duration * 1_000_000_000)
         self._disabled_until[layer] = max(until, self._disabled_until.get(layer, 0))
+        self._next_expiry_ns = 0
         logger.warning("layer_paused", layer=layer.value, duration=duration)
 
     def resume_layer(self, layer: LayerType) -> None:
         if layer in self._disabled_until:
             self._disabled_until.pop(layer, None)
+            self._next_expiry_ns = 0
             logger.info("layer_resumed", layer=layer.value)
@@ -2,15 +2,15 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Optional
+from typing import Iterable, Optional
 
 import structlog
 
-from ..adapters.openai import GPTClient, OmniModerationClient, RuleSynthesisClient
+from ..adapters.openai import GPTClient, OmniModerationClient, OpenAIAdapter, RuleSynthesisClient
 from ..batching.batcher import MessageBatcher
 from ..config import BotSettings
 from ..logging.events import setup_logging
-from ..models import ActionType, LayerType, MessageEnvelope, RuleSource, RuleType
+from ..models import LAYER_BY_VALUE, ActionType, LayerType, MessageEnvelope, RuleSource, RuleType
 from ..pipeline.layers.chatgpt import ChatGPTLayer
 from ..pipeline.layers.omni import OmniModerationLayer
 from ..pipeline.layers.regex import RegexLayer
@@ -41,25 +41,38 @@ class ModerationCoordinator:
         )
         self._storage = SQLiteStorage(settings.storage.sqlite_path)
         self._registry = RuleRegistry()
+        # One pooled HTTP/2 client shared by every adapter so all OpenAI
+        # traffic multiplexes over the same keepalive connections.
+        self._api_client = OpenAIAdapter.build_client(
+            settings.openai.api_key,
+            base_url=settings.openai.base_url,
+            timeout=settings.openai.timeout_seconds,
+            max_connections=settings.openai.max_connections,
+            max_keepalive_connections=settings.openai.max_keepalive_connections,
+            keepalive_expiry=settings.openai.keepalive_expiry_seconds,
+        )
         self._synth_client = RuleSynthesisClient(
             api_key=settings.openai.api_key,
             base_url=settings.openai.base_url,
-            timeout=settings.openai.timeout_seconds,
+            client=self._api_client,
         )
         self._rule_service = RuleService(self._registry, self._storage, self._synth_client)
         self._omni_client = OmniModerationClient(
             api_key=settings.openai.api_key,
             base_url=settings.openai.base_url,
-            timeout=settings.openai.timeout_seconds,
+            client=self._api_client,
+            cache_ttl_seconds=settings.openai.moderation_cache_ttl_seconds,
+            cache_max_entries=settings.openai.moderation_cache_max_entries,
         )
         self._gpt_client = GPTClient(
             api_key=settings.openai.api_key,
             base_url=settings.openai.base_url,
-            timeout=settings.openai.timeout_seconds,
+            client=self._api_client,
         )
+        self._regex_layer = RegexLayer(self._registry, max_workers=settings.layers.regex_workers)
         self._pipeline = ModerationPipeline(
             layers=(
-                RegexLayer(self._registry, max_workers=settings.layers.regex_workers),
+                self._regex_layer,
                 OmniModerationLayer(
                     self._omni_client, self._registry, concurrency_limit=settings.layers.omni_concurrency
                 ),
@@ -73,30 +86,48 @@ class ModerationCoordinator:
             pipeline=self._pipeline,
             storage=self._storage,
             aggregator=PunishmentAggregator(),
+            rules=self._registry,
             max_concurrent_batches=settings.scheduler.concurrent_batches,
             decision_callback=decision_callback,
+            result_cache_ttl_seconds=settings.storage.result_cache_ttl_seconds,
         )
         self._ready = asyncio.Event()
+        # Plain bool fast path for ingest; the Event only matters during startup.
+        self._ready_flag = False
+        self._cache_sweeper: Optional[asyncio.Task[None]] = None
 
     async def start(self) -> None:
         await self._storage.connect()
         await self._rule_service.bootstrap()
         await self._batcher.start()
         await self._scheduler.start()
+        self._cache_sweeper = asyncio.create_task(self._sweep_result_cache())
+        self._ready_flag = True
         self._ready.set()
         logger.info("moderation_coordinator_started")
 
+    async def _sweep_result_cache(self) -> None:
+        ttl = self._settings.storage.result_cache_ttl_seconds
+        while True:
+            await asyncio.sleep(600)
+            try:
+                await self._storage.purge_cached_results(ttl)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("result_cache_purge_failed", error=str(exc))
+
     async def shutdown(self) -> None:
+        if self._cache_sweeper:
+            self._cache_sweeper.cancel()
+            self._cache_sweeper = None
         await self._scheduler.stop()
         await self._batcher.stop()
         await self._storage.disconnect()
-        await self._omni_client.close()
-        await self._gpt_client.close()
-        await self._synth_client.close()
+        await self._api_client.aclose()
         logger.info("moderation_coordinator_stopped")
 
     async def ingest(self, message: MessageEnvelope) -> None:
-        await self._ready.wait()
+        if not self._ready_flag:
+            await self._ready.wait()
         logger.debug(
             "coordinator_ingest",
             chat_id=message.context.chat_id,
@@ -104,6 +135,11 @@ class ModerationCoordinator:
         )
         await self._batcher.submit(message)
 
+    async def ingest_many(self, messages: Iterable[MessageEnvelope]) -> None:
+        if not self._ready_flag:
+            await self._ready.wait()
+        await self._batcher.submit_many(messages)
+
     async def add_rule(
         self,
         description: str,
@@ -118,7 +154,7 @@ class ModerationCoordinator:
         category: Optional[str] = None,
     ):
         logger.info("coordinator_add_rule", source=source, action=action.value, chat_id=chat_id)
-        return await self._rule_service.add_rule(
+        rule = await self._rule_service.add_rule(
             description,
             action,
             source,
@@ -129,6 +165,9 @@ class ModerationCoordinator:
             pattern=pattern,
             category=category,
         )
+        if rule.layer is LayerType.REGEX and rule.pattern:
+            await self._regex_layer.prewarm_pattern(rule.pattern)
+        return rule
 
     async def remove_rule(self, rule_id: str) -> None:
         logger.info("coordinator_remove_rule", rule_id=rule_id)
@@ -138,21 +177,15 @@ class ModerationCoordinator:
         return await self._rule_service.list_rules(chat_id)
 
     def pause_layer(self, layer: str, duration: float) -> None:
-        from ..models import LayerType
-
-        try:
-            layer_enum = LayerType(layer)
-        except ValueError:
+        layer_enum = LAYER_BY_VALUE.get(layer)
+        if layer_enum is None:
             logger.warning("pause_layer_unknown", layer=layer)
             return
         self._scheduler.pause_layer(layer_enum, duration)
 
     def resume_layer(self, layer: str) -> None:
-        from ..models import LayerType
-
-        try:
-            layer_enum = LayerType(layer)
-        except ValueError:
+        layer_enum = LAYER_BY_VALUE.get(layer)
+        if layer_enum is None:
             logger.warning("resume_layer_unknown", layer=layer)
             return
         self._scheduler.resume_layer(layer_enum)
@@ -2,16 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import base64
-import html
+import functools
 import shlex
+from dataclasses import dataclass
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from io import BytesIO
 from typing import Optional
 import re
 
 import structlog
 from aiogram import Bot, Dispatcher, F
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ChatMemberStatus, ChatType
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.filters import Command
@@ -28,10 +29,21 @@ from aiogram.types import (
 from ..config import BotSettings
 from ..models import ActionType, ChatContext, LayerType, MessageEnvelope, ModerationRule, RuleType
 from ..punishments.aggregator import PunishmentDecision
+from ..utils.cache import ResultCache
 from .moderation_service import ModerationCoordinator
 
 logger = structlog.get_logger(__name__)
 
+# html.escape runs one str.replace pass per special character; a translate
+# table escapes in a single pass, and this fires on every verdict notification.
+_HTML_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+
+def _escape_html(text: str) -> str:
+    return text.translate(_HTML_ESCAPE_TABLE)
+
 PANEL_HELP = (
     "🔧 *Панель администратора*\n"
     "• В личке используйте `/panel` и кнопки меню — все операции доступны из клавиатуры.\n"
@@ -47,6 +59,153 @@ PANEL_HELP = (
 )
 
 
+# Command arguments are whitespace-separated tokens with optional "..." quoting
+# (also mid-token, as in pattern="spam link"); one C-level findall pass replaces
+# shlex's per-character Python state machine.
+_RULE_TOKEN_RE = re.compile(r'(?:[^\s"]+|"[^"]*")+')
+
+# Matches every panel callback in one scan; the captured kind picks the
+# handler out of the dispatch dict in _dispatch_panel_callback.
+_PANEL_CALLBACK_RE = re.compile(r"^panel:(chat|action|wizard):")
+
+# Duration tokens are runs of <number><unit> pairs, e.g. 1h30m.
+_DURATION_RE = re.compile(r"(\d+)([smhd])")
+
+# Anchored variant for validity probes; fullmatch here accepts exactly the
+# tokens _parse_duration would parse without error.
+_LOOKS_DURATION_RE = re.compile(r"(?:\d+[smhd])+")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Command-token lookups built once at import; a dict get here beats the
+# Enum constructor and avoids rebuilding the literal on every parse.
+_ACTION_MAP = {action.value: action for action in ActionType}
+_LAYER_MAP = {
+    "regex": LayerType.REGEX,
+    "omni": LayerType.OMNI,
+    "chatgpt": LayerType.CHATGPT,
+    "gpt": LayerType.CHATGPT,
+}
+_RULE_TYPE_MAP = {
+    "regex": RuleType.REGEX,
+    "semantic": RuleType.SEMANTIC,
+    "contextual": RuleType.CONTEXTUAL,
+}
+
+# key=value prefixes recognized ahead of the description in /addrule.
+_RULE_META_KEYS = frozenset({"layer", "type", "category", "pattern"})
+
+
+@dataclass(slots=True)
+class AdminSession:
+    """Per-admin state for the private-chat panel UI.
+
+    chat_selected distinguishes "no chat chosen yet" from the global scope,
+    where chat_id is legitimately None.
+    """
+
+    chat_id: Optional[int] = None
+    chat_title: Optional[str] = None
+    chat_selected: bool = False
+    status_message: Optional[str] = None
+    panel_message_id: Optional[int] = None
+    flow: Optional[dict] = None
+    render_key: Optional[tuple] = None
+    render_text: Optional[str] = None
+
+
+def _tokenize_command(text: str) -> list[str]:
+    if '"' not in text:
+        if "\\" not in text:
+            # No quoting at all — the overwhelmingly common case — is plain
+            # whitespace splitting, done in C.
+            return text.split()
+        # Backslash escapes are beyond the simple grammar; keep shlex for them.
+        return shlex.split(text)
+    if "\\" in text:
+        return shlex.split(text)
+    return [
+        token.replace('"', "") if '"' in token else token
+        for token in _RULE_TOKEN_RE.findall(text)
+    ]
+
+
+class _Base64Writer:
+    """File-like sink that base64-encodes chunks as they are written.
+
+    Encoding during the download keeps peak memory at roughly the encoded
+    size instead of raw bytes plus a full encoded copy, and saves the second
+    pass over the image.
+    """
+
+    __slots__ = ("_buf", "_rem")
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._rem = b""
+
+    def write(self, chunk: bytes) -> int:
+        data = self._rem + chunk
+        head = (len(data) // 3) * 3
+        self._buf += base64.b64encode(data[:head])
+        self._rem = data[head:]
+        return len(chunk)
+
+    def flush(self) -> None:  # file-like protocol expected by Bot.download
+        return None
+
+    def finalize(self) -> bytes:
+        if self._rem:
+            self._buf += base64.b64encode(self._rem)
+            self._rem = b""
+        return bytes(self._buf)
+
+
+# Keyboards are pure functions of their arguments, so memoize the aiogram
+# model construction; a panel refresh click reuses the cached markup instead
+# of rebuilding button rows. _handle_my_chat_member clears both caches when
+# the bot's chat membership changes.
+@functools.lru_cache(maxsize=512)
+def _build_chat_selector_keyboard(admin_chats: tuple[tuple[int, str], ...]) -> InlineKeyboardMarkup:
+    rows: list[list[InlineKeyboardButton]] = [
+        [InlineKeyboardButton(text="🌐 Global rules", callback_data="panel:chat:global")]
+    ]
+    for chat_id, title in admin_chats[:12]:
+        rows.append(
+            [
+                InlineKeyboardButton(
+                    text=title or str(chat_id),
+                    callback_data=f"panel:chat:{chat_id}",
+                )
+            ]
+        )
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+@functools.lru_cache(maxsize=512)
+def _build_admin_menu(chat_key: str, include_global_shortcut: bool) -> InlineKeyboardMarkup:
+    buttons: list[list[InlineKeyboardButton]] = [
+        [
+            InlineKeyboardButton(text="📋 Список правил", callback_data=f"panel:action:list:{chat_key}"),
+            InlineKeyboardButton(text="🔄 Обновить", callback_data=f"panel:action:refresh:{chat_key}"),
+        ],
+        [
+            InlineKeyboardButton(text="➕ Добавить правило", callback_data=f"panel:action:add:{chat_key}"),
+            InlineKeyboardButton(text="➖ Удалить правило", callback_data=f"panel:action:remove:{chat_key}"),
+        ],
+    ]
+    if include_global_shortcut:
+        buttons.append(
+            [InlineKeyboardButton(text="🌐 Перейти к глобальным", callback_data="panel:chat:global")]
+        )
+    buttons.append(
+        [
+            InlineKeyboardButton(text="🔁 Сменить чат", callback_data=f"panel:action:switch:{chat_key}"),
+            InlineKeyboardButton(text="ℹ️ Помощь", callback_data=f"panel:action:help:{chat_key}"),
+        ]
+    )
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 class TelegramModerationApp:
     """
     Aiogram integration wrapper that wires moderation pipeline into Telegram handlers.
@@ -57,13 +216,38 @@ class TelegramModerationApp:
     - `/panel` in DM opens an inline chat picker and text interface to manage rules.
     """
 
+    # How long the notification worker keeps collecting narration after the
+    # first queued item before sending one digest per chat.
+    _NOTIFY_WINDOW_SECONDS = 1.0
+
     def __init__(self, settings: BotSettings) -> None:
         self._settings = settings
-        self.bot = Bot(token=settings.telegram_token)
+        # Explicit pooled session shared by every Bot call, including the
+        # get_file/download pair in _collect_images; a higher connection limit
+        # keeps photo fetches on warm keepalive connections during bursts.
+        self.bot = Bot(token=settings.telegram_token, session=AiohttpSession(limit=200))
         self.dispatcher = Dispatcher()
         self.coordinator = ModerationCoordinator(settings, decision_callback=self._on_decision)
         self._chat_cache: dict[int, str] = {}
-        self._admin_sessions: dict[int, dict[str, Optional[int]]] = {}
+        self._admin_sessions: dict[int, AdminSession] = {}
+        # Short-TTL cache for admin-status checks plus in-flight coalescing,
+        # so button bursts don't translate into one getChatMember call each.
+        self._admin_cache: ResultCache[bool] = ResultCache(max_entries=4096, ttl_seconds=60.0)
+        self._admin_checks: dict[tuple[int, int], asyncio.Future[bool]] = {}
+        # Per-user "chats where you are admin" listing; cleared whenever the
+        # bot's own chat membership changes.
+        self._admin_chats_cache: ResultCache[dict[int, str]] = ResultCache(
+            max_entries=1024, ttl_seconds=30.0
+        )
+        # Ingest runs as bounded background tasks so message handlers return
+        # immediately and polling keeps advancing during moderation bursts.
+        self._ingest_semaphore = asyncio.Semaphore(64)
+        self._pending_ingests: set[asyncio.Task[None]] = set()
+        # Punitive actions stay immediate; narration messages funnel through
+        # this queue so bursts collapse into one digest per chat per window.
+        self._notify_queue: asyncio.Queue[tuple[int, Optional[int], str]] = asyncio.Queue()
+        self._notify_task: Optional[asyncio.Task[None]] = None
+        self._rule_label_cache: dict[str, str] = {}
         self._register_handlers()
 
     def _register_handlers(self) -> None:
@@ -74,75 +258,60 @@ class TelegramModerationApp:
         self.dispatcher.message(Command(commands=["listrules"]))(self._handle_list_rules)
         self.dispatcher.message(F.text | F.caption | F.photo)(self._handle_message)
         self.dispatcher.message(lambda msg: msg.chat.type == ChatType.PRIVATE)(self._handle_admin_text)
-        self.dispatcher.callback_query(F.data.startswith("panel:chat:"))(self._handle_panel_select)
-        self.dispatcher.callback_query(F.data.startswith("panel:action:"))(self._handle_panel_action)
-        self.dispatcher.callback_query(F.data.startswith("panel:wizard:"))(self._handle_wizard_callback)
+        # One dispatcher-level filter for every panel callback; the per-kind
+        # fan-out happens via a single regex match plus a dict lookup instead
+        # of three startswith filters evaluated per event.
+        self._panel_callbacks = {
+            "chat": self._handle_panel_select,
+            "action": self._handle_panel_action,
+            "wizard": self._handle_wizard_callback,
+        }
+        # Panel button actions resolve through one dict lookup; handlers
+        # return False to suppress the trailing panel re-render.
+        self._panel_actions = {
+            "list": self._panel_action_list,
+            "refresh": self._panel_action_refresh,
+            "add": self._panel_action_add,
+            "remove": self._panel_action_remove,
+            "help": self._panel_action_help,
+            "switch": self._panel_action_switch,
+        }
+        self.dispatcher.callback_query(F.data.startswith("panel:"))(self._dispatch_panel_callback)
         self.dispatcher.my_chat_member()(self._handle_my_chat_member)
 
-    def _build_chat_selector_keyboard(self, admin_chats: list[tuple[int, str]]) -> InlineKeyboardMarkup:
-        rows: list[list[InlineKeyboardButton]] = [
-            [InlineKeyboardButton(text="🌐 Global rules", callback_data="panel:chat:global")]
-        ]
-        for chat_id, title in admin_chats[:12]:
-            rows.append(
-                [
-                    InlineKeyboardButton(
-                        text=title or str(chat_id),
-                        callback_data=f"panel:chat:{chat_id}",
-                    )
-                ]
-            )
-        return InlineKeyboardMarkup(inline_keyboard=rows)
-
-    def _build_admin_menu(self, chat_key: str, *, include_global_shortcut: bool) -> InlineKeyboardMarkup:
-        buttons: list[list[InlineKeyboardButton]] = [
-            [
-                InlineKeyboardButton(text="📋 Список правил", callback_data=f"panel:action:list:{chat_key}"),
-                InlineKeyboardButton(text="🔄 Обновить", callback_data=f"panel:action:refresh:{chat_key}"),
-            ],
-            [
-                InlineKeyboardButton(text="➕ Добавить правило", callback_data=f"panel:action:add:{chat_key}"),
-                InlineKeyboardButton(text="➖ Удалить правило", callback_data=f"panel:action:remove:{chat_key}"),
-            ],
-        ]
-        if include_global_shortcut:
-            buttons.append(
-                [InlineKeyboardButton(text="🌐 Перейти к глобальным", callback_data="panel:chat:global")]
-            )
-        buttons.append(
-            [
-                InlineKeyboardButton(text="🔁 Сменить чат", callback_data=f"panel:action:switch:{chat_key}"),
-                InlineKeyboardButton(text="ℹ️ Помощь", callback_data=f"panel:action:help:{chat_key}"),
-            ]
-        )
-        return InlineKeyboardMarkup(inline_keyboard=buttons)
-
     async def _render_admin_panel(
         self,
         *,
-        session: dict[str, Optional[int | str]],
+        session: AdminSession,
         message: Optional[Message] = None,
         user_id: Optional[int] = None,
     ) -> None:
-        chat_id = session.get("chat_id")
-        chat_title = session.get("chat_title") or ("Global rules" if chat_id is None else str(chat_id))
+        chat_id = session.chat_id
+        chat_title = session.chat_title or ("Global rules" if chat_id is None else str(chat_id))
         chat_key = "global" if chat_id is None else str(chat_id)
-        status_line = session.get("status_message") or "Используйте кнопки ниже для действий с правилами."
+        status_line = session.status_message or "Используйте кнопки ниже для действий с правилами."
 
-        text = (
-            f"*Управление чатом:* {chat_title}\n"
-            f"`ID:` {chat_id if chat_id is not None else 'global'}\n\n"
-            f"{status_line}\n\n"
-            "Доступно: просмотр активных правил, создание новых, удаление существующих, переключение чата."
-        )
-        keyboard = self._build_admin_menu(chat_key, include_global_shortcut=chat_id is not None)
+        # Refresh clicks usually change nothing; reuse the previously composed
+        # panel text while (chat, title, status) stay the same.
+        render_key = (chat_id, chat_title, status_line)
+        text = session.render_text
+        if text is None or session.render_key != render_key:
+            text = (
+                f"*Управление чатом:* {chat_title}\n"
+                f"`ID:` {chat_id if chat_id is not None else 'global'}\n\n"
+                f"{status_line}\n\n"
+                "Доступно: просмотр активных правил, создание новых, удаление существующих, переключение чата."
+            )
+            session.render_key = render_key
+            session.render_text = text
+        keyboard = _build_admin_menu(chat_key, chat_id is not None)
         if message is not None:
             rendered = await message.edit_text(text, parse_mode="Markdown", reply_markup=keyboard)
-        elif user_id is not None and session.get("panel_message_id"):
+        elif user_id is not None and session.panel_message_id:
             rendered = await self.bot.edit_message_text(
                 text=text,
                 chat_id=user_id,
-                message_id=session["panel_message_id"],
+                message_id=session.panel_message_id,
                 parse_mode="Markdown",
                 reply_markup=keyboard,
             )
@@ -153,7 +322,7 @@ class TelegramModerationApp:
                 parse_mode="Markdown",
                 reply_markup=keyboard,
             )
-        session["panel_message_id"] = rendered.message_id
+        session.panel_message_id = rendered.message_id
 
     async def _prompt_chat_selection(
         self,
@@ -162,7 +331,7 @@ class TelegramModerationApp:
         *,
         replace: bool = False,
     ) -> None:
-        admin_chats = await self._available_admin_chats(user_id)
+        admin_chats = await self._cached_admin_chats(user_id)
         if not admin_chats:
             text = (
                 "Пока что я не видел чатов, где вы админ.\n"
@@ -174,7 +343,7 @@ class TelegramModerationApp:
             else:
                 await target_message.answer(text, parse_mode="Markdown")
             return
-        keyboard = self._build_chat_selector_keyboard(admin_chats)
+        keyboard = _build_chat_selector_keyboard(tuple(admin_chats.items()))
         text = (
             "Выберите чат, которым хотите управлять.\n"
             "Используйте кнопки ниже."
@@ -183,40 +352,50 @@ class TelegramModerationApp:
             rendered = await target_message.edit_text(text, parse_mode="Markdown", reply_markup=keyboard)
         else:
             rendered = await target_message.reply(text, parse_mode="Markdown", reply_markup=keyboard)
-        session = self._admin_sessions.setdefault(user_id, {})
-        session["flow"] = None
-        session["panel_message_id"] = rendered.message_id
+        session = self._admin_sessions.setdefault(user_id, AdminSession())
+        session.flow = None
+        session.panel_message_id = rendered.message_id
 
     def _format_rules_markdown(self, rules) -> str:
         if not rules:
             return "_Правила ещё не настроены._"
-        lines = [
-            f"• `{rule.rule_id}` — *{rule.layer.value}/{rule.rule_type.value}* — "
-            f"{self._format_action_label(rule.action, rule.action_duration_seconds)}\n"
-            f"  {rule.description}"
-            for rule in rules
-        ]
-        return "*Активные правила:*\n" + "\n".join(lines)
+        # Rules are immutable once created and rule_id is a fresh uuid per
+        # rule, so rendered lines are cached across list/refresh clicks.
+        labels = self._rule_label_cache
+        if len(labels) > 4096:
+            labels.clear()
+        parts = ["*Активные правила:*"]
+        for rule in rules:
+            label = labels.get(rule.rule_id)
+            if label is None:
+                label = (
+                    f"• `{rule.rule_id}` — *{rule.layer.value}/{rule.rule_type.value}* — "
+                    f"{self._format_action_label(rule.action, rule.action_duration_seconds)}\n"
+                    f"  {rule.description}"
+                )
+                labels[rule.rule_id] = label
+            parts.append(label)
+        return "\n".join(parts)
 
     def _format_user_mention(self, ctx: ChatContext) -> str:
         if ctx.username:
-            return f"@{html.escape(ctx.username)}"
+            return f"@{_escape_html(ctx.username)}"
         return f'<a href="tg://user?id={ctx.user_id}">{ctx.user_id}</a>'
 
     def _format_reason(self, reason: str) -> str:
-        return html.escape(reason or "—")
+        return _escape_html(reason or "—")
 
-    def _set_status(self, session: dict, message: str) -> None:
-        session["status_message"] = message
+    def _set_status(self, session: AdminSession, message: str) -> None:
+        session.status_message = message
 
     async def _start_add_wizard(
         self,
-        session: dict,
+        session: AdminSession,
         *,
         user_id: int,
         chat_id: Optional[int],
     ) -> None:
-        session["flow"] = {
+        session.flow = {
             "type": "add",
             "stage": "choose_action",
             "chat_id": chat_id,
@@ -276,19 +455,19 @@ class TelegramModerationApp:
             reply_markup=keyboard,
         )
 
-    async def _request_add_description(self, session: dict, user_id: int) -> None:
-        session["flow"]["stage"] = "await_description"
+    async def _request_add_description(self, session: AdminSession, user_id: int) -> None:
+        session.flow["stage"] = "await_description"
         self._set_status(session, "Создание правила: введите описание.")
         prompt = await self.bot.send_message(
             user_id,
             "Введите описание правила (что запрещено и почему):",
             reply_markup=ForceReply(input_field_placeholder="Описание правила"),
         )
-        session["flow"]["prompt_message_id"] = prompt.message_id
+        session.flow["prompt_message_id"] = prompt.message_id
 
     async def _start_remove_wizard(
         self,
-        session: dict,
+        session: AdminSession,
         *,
         user_id: int,
         chat_id: Optional[int],
@@ -299,7 +478,7 @@ class TelegramModerationApp:
             await self.bot.send_message(user_id, "Правила не найдены.")
             return
 
-        session["flow"] = {
+        session.flow = {
             "type": "remove",
             "stage": "choose_rule",
             "chat_id": chat_id,
@@ -325,8 +504,8 @@ class TelegramModerationApp:
             text += f" — {description[:40]}" + ("…" if len(description) > 40 else "")
         return text[:64]
 
-    async def _complete_add_flow(self, session: dict, user_id: int, description: str) -> None:
-        flow = session.get("flow")
+    async def _complete_add_flow(self, session: AdminSession, user_id: int, description: str) -> None:
+        flow = session.flow
         if not flow or flow.get("type") != "add":
             return
         action: ActionType = flow["data"]["action"]
@@ -364,10 +543,10 @@ class TelegramModerationApp:
                 rule_id=rule.rule_id,
             )
         finally:
-            session["flow"] = None
+            session.flow = None
 
-    async def _cancel_flow(self, session: dict, user_id: int) -> None:
-        session["flow"] = None
+    async def _cancel_flow(self, session: AdminSession, user_id: int) -> None:
+        session.flow = None
         self._set_status(session, "Действие отменено.")
         await self.bot.send_message(user_id, "Отменено. Используйте меню для следующего действия.")
 
@@ -389,7 +568,7 @@ class TelegramModerationApp:
             return
         self._remember_chat(message.chat)
 
-        tokens = shlex.split(message.text or "")
+        tokens = _tokenize_command(message.text or "")
         if len(tokens) < 4:
             await message.reply("Usage: /addrule <action[:duration]> <scope:chat|global> [layer=...] [type=...] [category=...] [pattern=...] <description>")
             return
@@ -484,23 +663,19 @@ class TelegramModerationApp:
             duration=duration_seconds,
         )
         user_ref = self._format_user_mention(ctx)
-        rule_ref = html.escape(verdict.rule_code)
+        rule_ref = _escape_html(verdict.rule_code)
         reason_html = self._format_reason(verdict.reason)
         try:
             if verdict.action == ActionType.DELETE:
                 await self.bot.delete_message(ctx.chat_id, ctx.message_id)
             elif verdict.action == ActionType.WARN:
-                text = (
+                self._queue_notification(
+                    ctx.chat_id,
                     "⚠️ <b>Предупреждение</b>\n"
                     f"Пользователь: {user_ref}\n"
                     f"Причина: {reason_html}\n"
-                    f"Правило: <code>{rule_ref}</code>"
-                )
-                await self.bot.send_message(
-                    ctx.chat_id,
-                    text,
-                    parse_mode="HTML",
-                    reply_to_message_id=ctx.message_id,
+                    f"Правило: <code>{rule_ref}</code>",
+                    reply_to=ctx.message_id,
                 )
             elif verdict.action == ActionType.MUTE:
                 seconds = duration_seconds or 15 * 60
@@ -511,37 +686,34 @@ class TelegramModerationApp:
                     permissions=ChatPermissions(can_send_messages=False),
                     until_date=until,
                 )
-                await self.bot.send_message(
+                self._queue_notification(
                     ctx.chat_id,
                     "🔇 <b>Мут</b>\n"
                     f"Пользователь: {user_ref}\n"
-                    f"Длительность: {html.escape(self._humanize_duration(seconds))}\n"
+                    f"Длительность: {_escape_html(self._humanize_duration(seconds))}\n"
                     f"Причина: {reason_html}\n"
                     f"Правило: <code>{rule_ref}</code>",
-                    parse_mode="HTML",
                 )
             elif verdict.action == ActionType.BAN:
                 if duration_seconds:
                     until = datetime.now(timezone.utc) + timedelta(seconds=duration_seconds)
                     await self.bot.ban_chat_member(ctx.chat_id, ctx.user_id, until_date=until)
-                    await self.bot.send_message(
+                    self._queue_notification(
                         ctx.chat_id,
                         "🚫 <b>Бан</b>\n"
                         f"Пользователь: {user_ref}\n"
-                        f"Длительность: {html.escape(self._humanize_duration(duration_seconds))}\n"
+                        f"Длительность: {_escape_html(self._humanize_duration(duration_seconds))}\n"
                         f"Причина: {reason_html}\n"
                         f"Правило: <code>{rule_ref}</code>",
-                        parse_mode="HTML",
                     )
                 else:
                     await self.bot.ban_chat_member(ctx.chat_id, ctx.user_id)
-                    await self.bot.send_message(
+                    self._queue_notification(
                         ctx.chat_id,
                         "🚫 <b>Бан</b>\n"
                         f"Пользователь: {user_ref}\n"
                         f"Причина: {reason_html}\n"
                         f"Правило: <code>{rule_ref}</code>",
-                        parse_mode="HTML",
                     )
         except Exception as exc:
             logger.error(
@@ -551,27 +723,82 @@ class TelegramModerationApp:
                 chat_id=ctx.chat_id,
             )
 
+    def _queue_notification(self, chat_id: int, text: str, *, reply_to: Optional[int] = None) -> None:
+        self._notify_queue.put_nowait((chat_id, reply_to, text))
+
+    async def _notify_worker(self) -> None:
+        # Telegram caps outbound messages per chat, and a single spam wave can
+        # trigger dozens of verdicts at once. Collect narration for up to one
+        # second after the first item, then send one digest per chat.
+        loop = asyncio.get_running_loop()
+        while True:
+            chat_id, reply_to, text = await self._notify_queue.get()
+            pending: dict[int, list[tuple[Optional[int], str]]] = {chat_id: [(reply_to, text)]}
+            deadline = loop.time() + self._NOTIFY_WINDOW_SECONDS
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    chat_id, reply_to, text = await asyncio.wait_for(
+                        self._notify_queue.get(), timeout=remaining
+                    )
+                except asyncio.TimeoutError:
+                    break
+                pending.setdefault(chat_id, []).append((reply_to, text))
+            await self._flush_notifications(pending)
+
+    async def _flush_notifications(
+        self, pending: dict[int, list[tuple[Optional[int], str]]]
+    ) -> None:
+        for chat_id, notices in pending.items():
+            try:
+                if len(notices) == 1:
+                    reply_to, text = notices[0]
+                    await self.bot.send_message(
+                        chat_id,
+                        text,
+                        parse_mode="HTML",
+                        reply_to_message_id=reply_to,
+                    )
+                else:
+                    await self.bot.send_message(
+                        chat_id,
+                        "\n\n".join(text for _, text in notices),
+                        parse_mode="HTML",
+                    )
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error(
+                    "notification_send_failed",
+                    error=str(exc),
+                    chat_id=chat_id,
+                    notices=len(notices),
+                )
+
     async def _handle_message(self, message: Message) -> None:
-        if message.chat.type not in {ChatType.GROUP, ChatType.SUPERGROUP, ChatType.PRIVATE}:
+        # Cheap rejections run before any allocation: aiogram models resolve
+        # attributes through pydantic, so hoist the repeated ones into locals.
+        chat_type = message.chat.type
+        if chat_type is not ChatType.GROUP and chat_type is not ChatType.SUPERGROUP:
             return
-        if message.text and message.text.startswith('/'):
-            return
-        if message.chat.type == ChatType.PRIVATE:
+        text = message.text
+        if text and text.startswith('/'):
             return
 
         self._remember_chat(message.chat)
 
+        from_user = message.from_user
         images = await self._collect_images(message)
         envelope = MessageEnvelope(
             context=ChatContext(
                 chat_id=message.chat.id,
-                user_id=message.from_user.id if message.from_user else 0,
+                user_id=from_user.id if from_user else 0,
                 message_id=message.message_id,
                 timestamp=message.date.replace(tzinfo=timezone.utc),
-                username=message.from_user.username if message.from_user else None,
-                language_code=message.from_user.language_code if message.from_user else None,
+                username=from_user.username if from_user else None,
+                language_code=from_user.language_code if from_user else None,
             ),
-            text=message.text,
+            text=text,
             caption=message.caption,
             media_type=self._detect_media_type(message),
             images=images,
@@ -587,19 +814,40 @@ class TelegramModerationApp:
             media_type=envelope.media_type,
             images=len(images),
         )
-        await self.coordinator.ingest(envelope)
+        task = asyncio.create_task(self._bounded_ingest(envelope))
+        self._pending_ingests.add(task)
+        task.add_done_callback(self._pending_ingests.discard)
+
+    async def _bounded_ingest(self, envelope: MessageEnvelope) -> None:
+        async with self._ingest_semaphore:
+            try:
+                await self.coordinator.ingest(envelope)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error(
+                    "ingest_failed",
+                    error=str(exc),
+                    chat_id=envelope.context.chat_id,
+                    message_id=envelope.context.message_id,
+                )
 
     async def _collect_images(self, message: Message) -> list[str]:
+        # Images are shipped as data URLs because both downstream consumers
+        # (the omni /moderations endpoint and chat-completion image parts)
+        # only accept URLs; passing raw bytes through the envelope would just
+        # move this encode into every layer that touches the image.
         if not message.photo:
             return []
         largest_photo = message.photo[-1]
         file = await self.bot.get_file(largest_photo.file_id)
-        buffer = BytesIO()
-        await self.bot.download(file, destination=buffer)
+        writer = _Base64Writer()
+        await self.bot.download(file, destination=writer, seek=False)
         mime = "image/jpeg"
         if file.file_path and file.file_path.lower().endswith(".png"):
             mime = "image/png"
-        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+        # Chunks were encoded incrementally during the download; the final
+        # pass still materializes the multi-megabyte ASCII string, so it runs
+        # in a worker thread instead of stalling the event loop.
+        encoded = await asyncio.to_thread(lambda: writer.finalize().decode("ascii"))
         return [f"data:{mime};base64,{encoded}"]
 
     def _detect_media_type(self, message: Message) -> Optional[str]:
@@ -610,9 +858,18 @@ class TelegramModerationApp:
         return None
     async def run(self) -> None:
         await self.coordinator.start()
+        self._notify_task = asyncio.create_task(self._notify_worker())
         try:
-            await self.dispatcher.start_polling(self.bot)
+            # Restrict polling to the update types with registered handlers so
+            # Telegram neither sends nor aiogram parses anything else.
+            await self.dispatcher.start_polling(
+                self.bot,
+                allowed_updates=self.dispatcher.resolve_used_update_types(),
+            )
         finally:
+            if self._notify_task is not None:
+                self._notify_task.cancel()
+                self._notify_task = None
             await self.coordinator.shutdown()
             await self.bot.session.close()
 
@@ -623,11 +880,17 @@ class TelegramModerationApp:
         self._admin_sessions.pop(message.from_user.id, None)
         await self._prompt_chat_selection(message, message.from_user.id, replace=False)
 
+    async def _dispatch_panel_callback(self, callback: CallbackQuery) -> None:
+        match = _PANEL_CALLBACK_RE.match(callback.data or "")
+        if match is None:
+            return
+        await self._panel_callbacks[match.group(1)](callback)
+
     async def _handle_panel_select(self, callback: CallbackQuery) -> None:
         await callback.answer()
         raw_chat_id = callback.data.split(":")[2]
         user_id = callback.from_user.id
-        admin_chats = dict(await self._available_admin_chats(user_id))
+        admin_chats = await self._cached_admin_chats(user_id)
         if raw_chat_id == "global":
             chat_id = None
             chat_title = "Глобальные правила"
@@ -641,15 +904,12 @@ class TelegramModerationApp:
                 await callback.message.edit_text("Вы не администратор в этом чате или он недоступен.")
                 return
             chat_title = admin_chats[chat_id]
-        session = self._admin_sessions.setdefault(user_id, {})
-        session.update(
-            {
-                "chat_id": chat_id,
-                "chat_title": chat_title,
-                "flow": None,
-                "status_message": "Используйте кнопки ниже для действий с правилами.",
-            }
-        )
+        session = self._admin_sessions.setdefault(user_id, AdminSession())
+        session.chat_id = chat_id
+        session.chat_title = chat_title
+        session.chat_selected = True
+        session.flow = None
+        session.status_message = "Используйте кнопки ниже для действий с правилами."
         await self._render_admin_panel(session=session, message=callback.message, user_id=user_id)
 
     async def _handle_panel_action(self, callback: CallbackQuery) -> None:
@@ -660,46 +920,73 @@ class TelegramModerationApp:
         _, _, action, chat_key = parts
         user_id = callback.from_user.id
         session = self._admin_sessions.get(user_id)
-        if not session:
+        if session is None:
             await callback.message.answer("Сессия устарела. Отправьте /panel ещё раз.")
             return
-        expected_key = "global" if session.get("chat_id") is None else str(session.get("chat_id"))
+        expected_key = "global" if session.chat_id is None else str(session.chat_id)
         if chat_key != expected_key:
             await self._render_admin_panel(session=session, message=callback.message, user_id=user_id)
             return
 
-        chat_id = session.get("chat_id")
-        if action == "list":
-            rules = await self.coordinator.list_rules(chat_id)
-            await callback.message.answer(self._format_rules_markdown(rules), parse_mode="Markdown")
-            self._set_status(session, "📋 Список правил отправлен ниже.")
-        elif action == "refresh":
-            self._set_status(session, "🔄 Панель обновлена.")
-        elif action == "add":
-            await self._start_add_wizard(session, user_id=user_id, chat_id=chat_id)
-        elif action == "remove":
-            await self._start_remove_wizard(session, user_id=user_id, chat_id=chat_id)
-        elif action == "help":
-            await callback.message.answer(PANEL_HELP, parse_mode="Markdown")
-            self._set_status(session, "ℹ️ Памятка отправлена.")
-        elif action == "switch":
-            session["flow"] = None
-            self._set_status(session, "Выберите чат из списка.")
-            await self._prompt_chat_selection(callback.message, user_id, replace=True)
-            return
-        else:
+        chat_id = session.chat_id
+        handler = self._panel_actions.get(action)
+        if handler is None:
             self._set_status(session, "Неизвестное действие.")
+        elif not await handler(callback, session, user_id, chat_id):
+            return
         await self._render_admin_panel(session=session, message=callback.message, user_id=user_id)
 
+    async def _panel_action_list(
+        self, callback: CallbackQuery, session: AdminSession, user_id: int, chat_id: Optional[int]
+    ) -> bool:
+        rules = await self.coordinator.list_rules(chat_id)
+        await callback.message.answer(self._format_rules_markdown(rules), parse_mode="Markdown")
+        self._set_status(session, "📋 Список правил отправлен ниже.")
+        return True
+
+    async def _panel_action_refresh(
+        self, callback: CallbackQuery, session: AdminSession, user_id: int, chat_id: Optional[int]
+    ) -> bool:
+        self._set_status(session, "🔄 Панель обновлена.")
+        return True
+
+    async def _panel_action_add(
+        self, callback: CallbackQuery, session: AdminSession, user_id: int, chat_id: Optional[int]
+    ) -> bool:
+        await self._start_add_wizard(session, user_id=user_id, chat_id=chat_id)
+        return True
+
+    async def _panel_action_remove(
+        self, callback: CallbackQuery, session: AdminSession, user_id: int, chat_id: Optional[int]
+    ) -> bool:
+        await self._start_remove_wizard(session, user_id=user_id, chat_id=chat_id)
+        return True
+
+    async def _panel_action_help(
+        self, callback: CallbackQuery, session: AdminSession, user_id: int, chat_id: Optional[int]
+    ) -> bool:
+        await callback.message.answer(PANEL_HELP, parse_mode="Markdown")
+        self._set_status(session, "ℹ️ Памятка отправлена.")
+        return True
+
+    async def _panel_action_switch(
+        self, callback: CallbackQuery, session: AdminSession, user_id: int, chat_id: Optional[int]
+    ) -> bool:
+        # The selector prompt replaces the panel, so skip the re-render.
+        session.flow = None
+        self._set_status(session, "Выберите чат из списка.")
+        await self._prompt_chat_selection(callback.message, user_id, replace=True)
+        return False
+
     async def _handle_wizard_callback(self, callback: CallbackQuery) -> None:
         await callback.answer()
         parts = callback.data.split(":")
         user_id = callback.from_user.id
         session = self._admin_sessions.get(user_id)
-        if not session:
+        if session is None:
             await callback.message.answer("Сессия устарела. Отправьте /panel ещё раз.")
             return
-        flow = session.get("flow")
+        flow = session.flow
 
         if len(parts) >= 3 and parts[2] == "cancel":
             await self._cancel_flow(session, user_id)
@@ -718,10 +1005,8 @@ class TelegramModerationApp:
 
         if parts[2] == "add":
             if len(parts) >= 5 and parts[3] == "action":
-                action_value = parts[4]
-                try:
-                    action = ActionType(action_value)
-                except ValueError:
+                action = _ACTION_MAP.get(parts[4])
+                if action is None:
                     await callback.message.answer("Неизвестное действие. Выберите кнопку снова.")
                     return
                 flow["data"]["action"] = action
@@ -783,23 +1068,24 @@ class TelegramModerationApp:
                             logger.error("wizard_remove_failed", error=str(exc))
                             await callback.message.answer("Не удалось удалить правило.")
                             self._set_status(session, "⚠️ Не удалось удалить правило.")
-                session["flow"] = None
+                session.flow = None
         else:
             await callback.message.answer("Неизвестное действие мастера.")
 
         await self._render_admin_panel(session=session, user_id=user_id)
 
     async def _handle_admin_text(self, message: Message) -> None:
-        if message.text and message.text.startswith("/"):
+        raw_text = message.text
+        if raw_text and raw_text.startswith("/"):
             return
         user_id = message.from_user.id
         session = self._admin_sessions.get(user_id)
-        if not session or "chat_id" not in session:
+        if session is None or not session.chat_selected:
             await message.answer("Send /panel to choose a chat to manage.")
             return
 
-        flow = session.get("flow")
-        text = (message.text or message.caption or "").strip()
+        flow = session.flow
+        text = (raw_text or message.caption or "").strip()
         if not flow:
             await message.answer("Используйте меню ниже для управления правилами.")
             logger.debug("wizard_message_without_flow", user_id=user_id, text=text)
@@ -852,14 +1138,34 @@ class TelegramModerationApp:
         await message.answer("Используйте меню ниже.")
         await self._render_admin_panel(session=session, user_id=user_id)
 
+    async def _cached_admin_chats(self, user_id: int) -> dict[int, str]:
+        # One getChatAdministrators round-trip per known chat makes this the
+        # most expensive panel call; admin membership is stable over the
+        # cache's 30s TTL, and membership changes clear the cache outright.
+        cached = await self._admin_chats_cache.get(user_id)
+        if cached is not None:
+            return cached
+        chats = dict(await self._available_admin_chats(user_id))
+        await self._admin_chats_cache.set(user_id, chats)
+        return chats
+
     async def _available_admin_chats(self, user_id: int) -> list[tuple[int, str]]:
+        # One getChatAdministrators round-trip per chat; issue them
+        # concurrently so the wall time is one RTT instead of N.
+        known = list(self._chat_cache.items())
+        if not known:
+            return []
+        results = await asyncio.gather(
+            *(self.bot.get_chat_administrators(chat_id) for chat_id, _ in known),
+            return_exceptions=True,
+        )
         chats = []
-        for chat_id, title in self._chat_cache.items():
-            try:
-                admins = await self.bot.get_chat_administrators(chat_id)
-            except (TelegramForbiddenError, TelegramBadRequest) as exc:
-                logger.warning("admin_check_failed", chat_id=chat_id, error=str(exc))
-                continue
+        for (chat_id, title), admins in zip(known, results):
+            if isinstance(admins, BaseException):
+                if isinstance(admins, (TelegramForbiddenError, TelegramBadRequest)):
+                    logger.warning("admin_check_failed", chat_id=chat_id, error=str(admins))
+                    continue
+                raise admins
             if any(admin.user.id == user_id for admin in admins):
                 chats.append((chat_id, title))
         return chats
@@ -871,6 +1177,10 @@ class TelegramModerationApp:
             self._remember_chat(chat)
         elif status in {ChatMemberStatus.LEFT, ChatMemberStatus.KICKED}:
             self._chat_cache.pop(chat.id, None)
+        await self._admin_cache.clear()
+        await self._admin_chats_cache.clear()
+        _build_chat_selector_keyboard.cache_clear()
+        _build_admin_menu.cache_clear()
 
     def _remember_chat(self, chat) -> None:
         if chat.type in {ChatType.GROUP, ChatType.SUPERGROUP}:
@@ -881,29 +1191,21 @@ class TelegramModerationApp:
         self,
         tokens: list[str],
     ) -> tuple[Optional[LayerType], Optional[RuleType], Optional[str], Optional[str], str]:
-        layer_override: Optional[LayerType] = None
-        rule_type_override: Optional[RuleType] = None
-        category: Optional[str] = None
-        pattern: Optional[str] = None
+        # One partition per token instead of a startswith chain; raw values
+        # are collected first and converted once after the loop.
+        meta: dict[str, str] = {}
         description_tokens: list[str] = []
         for token in tokens:
-            lower = token.lower()
             if not description_tokens:
-                if lower.startswith("layer="):
-                    layer_override = self._parse_layer_value(token.split("=", 1)[1])
-                    continue
-                if lower.startswith("type="):
-                    rule_type_override = self._parse_rule_type_value(token.split("=", 1)[1])
-                    continue
-                if lower.startswith("category="):
-                    category = token.split("=", 1)[1]
-                    continue
-                if lower.startswith("pattern="):
-                    pattern = token.split("=", 1)[1]
+                key, sep, value = token.partition("=")
+                if sep and key.lower() in _RULE_META_KEYS:
+                    meta[key.lower()] = value
                     continue
             description_tokens.append(token)
+        layer_override = self._parse_layer_value(meta["layer"]) if "layer" in meta else None
+        rule_type_override = self._parse_rule_type_value(meta["type"]) if "type" in meta else None
         description = " ".join(description_tokens)
-        return layer_override, rule_type_override, category, pattern, description
+        return layer_override, rule_type_override, meta.get("category"), meta.get("pattern"), description
 
     def _parse_action_token(self, token: str) -> tuple[ActionType, Optional[int]]:
         raw = token.strip()
@@ -919,68 +1221,36 @@ class TelegramModerationApp:
                 raise ValueError("Duration must follow the action, e.g. mute:10m")
             duration_token = duration_part.split()[0]
             duration = self._parse_duration(duration_token)
-        try:
-            action = ActionType(base.lower())
-        except ValueError as exc:
-            raise ValueError("Unknown action. Use delete|warn|mute|ban.") from exc
+        action = _ACTION_MAP.get(base.lower())
+        if action is None:
+            raise ValueError("Unknown action. Use delete|warn|mute|ban.")
         return action, duration
 
     def _looks_like_duration(self, token: str) -> bool:
-        try:
-            self._parse_duration(token)
-            return True
-        except ValueError:
-            return False
+        return _LOOKS_DURATION_RE.fullmatch(token.lower()) is not None
 
     def _parse_layer_value(self, value: str) -> LayerType:
-        normalized = value.lower()
-        mapping = {
-            "regex": LayerType.REGEX,
-            "omni": LayerType.OMNI,
-            "chatgpt": LayerType.CHATGPT,
-            "gpt": LayerType.CHATGPT,
-        }
-        if normalized not in mapping:
+        layer = _LAYER_MAP.get(value.lower())
+        if layer is None:
             raise ValueError("Unknown layer. Use regex|omni|gpt.")
-        return mapping[normalized]
+        return layer
 
     def _parse_rule_type_value(self, value: str) -> RuleType:
-        normalized = value.lower()
-        mapping = {
-            "regex": RuleType.REGEX,
-            "semantic": RuleType.SEMANTIC,
-            "contextual": RuleType.CONTEXTUAL,
-        }
-        if normalized not in mapping:
+        rule_type = _RULE_TYPE_MAP.get(value.lower())
+        if rule_type is None:
             raise ValueError("Unknown rule type. Use regex|semantic|contextual.")
-        return mapping[normalized]
+        return rule_type
 
     def _parse_duration(self, token: str) -> int:
+        # The anchored fullmatch replaces the old running-span bookkeeping:
+        # a token either is a seamless run of <number><unit> pairs or it is
+        # rejected outright.
         token = token.lower()
-        pattern = re.compile(r"(\d+)([smhd])")
-        matches = list(pattern.finditer(token))
-        if not matches:
+        if _LOOKS_DURATION_RE.fullmatch(token) is None:
             raise ValueError("Invalid duration format. Use values like 30s, 10m, 2h, 3d.")
-        total = 0
-        consumed = 0
-        for match in matches:
-            start, end = match.span()
-            if start != consumed:
-                raise ValueError("Invalid duration format. Use values like 30s, 10m, 2h, 3d.")
-            consumed = end
-            value = int(match.group(1))
-            unit = match.group(2)
-            if unit == "s":
-                total += value
-            elif unit == "m":
-                total += value * 60
-            elif unit == "h":
-                total += value * 3600
-            elif unit == "d":
-                total += value * 86400
-        if consumed != len(token):
-            raise ValueError("Invalid duration format. Use values like 30s, 10m, 2h, 3d.")
-        return total
+        return sum(
+            int(value) * _DURATION_UNITS[unit] for value, unit in _DURATION_RE.findall(token)
+        )
 
     def _format_action_label(self, action: ActionType, duration_seconds: Optional[int]) -> str:
         if duration_seconds:
@@ -988,21 +1258,43 @@ class TelegramModerationApp:
         return action.value
 
     def _humanize_duration(self, seconds: int) -> str:
-        parts = []
-        remaining = seconds
-        for unit_seconds, suffix in ((86400, "d"), (3600, "h"), (60, "m"), (1, "s")):
-            if remaining >= unit_seconds:
-                value = remaining // unit_seconds
-                remaining %= unit_seconds
-                parts.append(f"{value}{suffix}")
+        days, rest = divmod(seconds, 86400)
+        hours, rest = divmod(rest, 3600)
+        minutes, secs = divmod(rest, 60)
+        parts = [f"{value}{unit}" for value, unit in zip((days, hours, minutes, secs), "dhms") if value]
         return " ".join(parts) if parts else "0s"
     async def _ensure_admin(self, chat_id: int, user_id: int) -> bool:
+        key = (chat_id, user_id)
+        cached = await self._admin_cache.get(key)
+        if cached is not None:
+            return cached
+        pending = self._admin_checks.get(key)
+        if pending is not None:
+            return await pending
+        future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._admin_checks[key] = future
         try:
-            member = await self.bot.get_chat_member(chat_id, user_id)
-        except (TelegramBadRequest, TelegramForbiddenError) as exc:
-            logger.warning("admin_check_failed", chat_id=chat_id, user_id=user_id, error=str(exc))
-            return False
-        return member.status in {ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR}
+            try:
+                member = await self.bot.get_chat_member(chat_id, user_id)
+            except (TelegramBadRequest, TelegramForbiddenError) as exc:
+                logger.warning(
+                    "admin_check_failed", chat_id=chat_id, user_id=user_id, error=str(exc)
+                )
+                # Denials from API failures are not cached so transient errors retry.
+                is_admin = False
+            else:
+                is_admin = member.status in {
+                    ChatMemberStatus.ADMINISTRATOR,
+                    ChatMemberStatus.CREATOR,
+                }
+                await self._admin_cache.set(key, is_admin)
+            future.set_result(is_admin)
+            return is_admin
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._admin_checks.pop(key, None)
 
 
 @asynccontextmanager
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import abc
-from typing import Iterable, Protocol
+from typing import Iterable, Protocol, Sequence
 
 from ..models import ModerationResult, ModerationRule
 
@@ -40,3 +40,18 @@ class StorageGateway(RuleRepository, IncidentRepository, abc.ABC):
     @abc.abstractmethod
     async def disconnect(self) -> None:
         ...
+
+    # Persistent result cache. Defaults are no-ops so gateways without a
+    # durable backend (e.g. in-memory test doubles) need not implement them.
+
+    async def get_cached_results(
+        self, hashes: Sequence[bytes], *, max_age_seconds: float
+    ) -> dict[bytes, dict]:
+        """Cached result payloads by content hash; absent keys are misses."""
+        return {}
+
+    async def store_cached_results(self, entries: Iterable[tuple[bytes, dict]]) -> None:
+        return None
+
+    async def purge_cached_results(self, max_age_seconds: float) -> None:
+        return None
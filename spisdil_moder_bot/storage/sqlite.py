@@ -1,12 +1,25 @@
 from __future__ import annotations
 
-import json
+import time
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional, Sequence
 
 import aiosqlite
 import structlog
 
+try:
+    import orjson
+
+    def _json_dumps(payload: Any) -> str:
+        return orjson.dumps(payload).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 from ..models import (
     ActionType,
     LayerType,
@@ -55,6 +68,15 @@ CREATE TABLE IF NOT EXISTS moderation_incidents (
 """
 
 
+CREATE_RESULT_CACHE = """
+CREATE TABLE IF NOT EXISTS moderation_cache (
+    text_hash BLOB PRIMARY KEY,
+    payload_json TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+)
+"""
+
+
 class SQLiteStorage(StorageGateway):
     def __init__(self, path: str | Path) -> None:
         self._path = Path(path)
@@ -66,6 +88,7 @@ class SQLiteStorage(StorageGateway):
         await self._conn.execute("PRAGMA journal_mode=WAL")
         await self._conn.execute(CREATE_RULES)
         await self._conn.execute(CREATE_INCIDENTS)
+        await self._conn.execute(CREATE_RESULT_CACHE)
         await self._ensure_schema()
         await self._conn.commit()
         logger.info("sqlite_connected", path=str(self._path))
@@ -82,7 +105,7 @@ class SQLiteStorage(StorageGateway):
         await cursor.close()
         rules = []
         for row in rows:
-            metadata = json.loads(row["metadata_json"])
+            metadata = _json_loads(row["metadata_json"])
             rule = ModerationRule(
                 rule_id=row["rule_id"],
                 description=row["description"],
@@ -134,7 +157,7 @@ class SQLiteStorage(StorageGateway):
                 rule.category,
                 int(rule.priority),
                 rule.action_duration_seconds,
-                json.dumps(rule.metadata),
+                _json_dumps(rule.metadata),
             ),
         )
         await self._conn.commit()
@@ -168,7 +191,7 @@ class SQLiteStorage(StorageGateway):
                     ctx.message_id,
                     ctx.timestamp.isoformat(),
                     verdict.reason,
-                    json.dumps(verdict.details),
+                    _json_dumps(verdict.details),
                 )
             )
         if not entries:
@@ -185,6 +208,51 @@ class SQLiteStorage(StorageGateway):
         await self._conn.commit()
         logger.info("sqlite_record_incidents", count=len(entries))
 
+    async def get_cached_results(
+        self, hashes: Sequence[bytes], *, max_age_seconds: float
+    ) -> dict[bytes, dict]:
+        assert self._conn
+        if not hashes:
+            return {}
+        cutoff = int(time.time() - max_age_seconds)
+        placeholders = ", ".join("?" * len(hashes))
+        cursor = await self._conn.execute(
+            f"SELECT text_hash, payload_json FROM moderation_cache "
+            f"WHERE created_at >= ? AND text_hash IN ({placeholders})",
+            (cutoff, *hashes),
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return {row["text_hash"]: _json_loads(row["payload_json"]) for row in rows}
+
+    async def store_cached_results(self, entries: Iterable[tuple[bytes, dict]]) -> None:
+        assert self._conn
+        now = int(time.time())
+        rows = [(text_hash, _json_dumps(payload), now) for text_hash, payload in entries]
+        if not rows:
+            return
+        await self._conn.executemany(
+            """
+            INSERT INTO moderation_cache (text_hash, payload_json, created_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(text_hash) DO UPDATE SET
+                payload_json=excluded.payload_json,
+                created_at=excluded.created_at
+            """,
+            rows,
+        )
+        await self._conn.commit()
+
+    async def purge_cached_results(self, max_age_seconds: float) -> None:
+        assert self._conn
+        cutoff = int(time.time() - max_age_seconds)
+        cursor = await self._conn.execute(
+            "DELETE FROM moderation_cache WHERE created_at < ?", (cutoff,)
+        )
+        await self._conn.commit()
+        if cursor.rowcount:
+            logger.info("sqlite_cache_purged", removed=cursor.rowcount)
+
     async def _ensure_schema(self) -> None:
         assert self._conn
         cursor = await self._conn.execute("PRAGMA table_info(moderation_rules)")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from spisdil_moder_bot.adapters.openai import OmniModerationClient
+
+
+class RecordingOmniClient(OmniModerationClient):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(api_key="test", **kwargs)
+        self.posted_payloads: list[dict] = []
+
+    async def post(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        self.posted_payloads.append(payload)
+        return {
+            "results": [
+                {"flagged": False, "categories": {}, "category_scores": {}}
+                for _ in payload["input"]
+            ]
+        }
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_issues_single_request() -> None:
+    client = RecordingOmniClient()
+    try:
+        results = await client.classify_batch(["one", "two", "three"])
+    finally:
+        await client.close()
+
+    assert len(results) == 3
+    assert len(client.posted_payloads) == 1
+    assert [item["text"] for item in client.posted_payloads[0]["input"]] == ["one", "two", "three"]
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_serves_repeats_from_cache() -> None:
+    client = RecordingOmniClient()
+    try:
+        await client.classify("repeated")
+        results = await client.classify_batch(["repeated", "fresh"])
+    finally:
+        await client.close()
+
+    assert len(results) == 2
+    # classify + one batch call covering only the uncached text
+    assert len(client.posted_payloads) == 2
+    assert [item["text"] for item in client.posted_payloads[1]["input"]] == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_splits_oversized_batches() -> None:
+    client = RecordingOmniClient()
+    try:
+        texts = [f"text-{i}" for i in range(OmniModerationClient.MAX_BATCH_INPUT + 1)]
+        results = await client.classify_batch(texts)
+    finally:
+        await client.close()
+
+    assert len(results) == len(texts)
+    assert len(client.posted_payloads) == 2
+    assert len(client.posted_payloads[0]["input"]) == OmniModerationClient.MAX_BATCH_INPUT
+    assert len(client.posted_payloads[1]["input"]) == 1
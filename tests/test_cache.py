@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+from spisdil_moder_bot.utils.cache import ResultCache
+
+
+@pytest.mark.asyncio
+async def test_cache_returns_stored_value() -> None:
+    cache: ResultCache[str] = ResultCache(max_entries=4, ttl_seconds=60)
+    await cache.set(b"key", "value")
+
+    assert await cache.get(b"key") == "value"
+    assert await cache.get(b"missing") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_entries_after_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr("spisdil_moder_bot.utils.cache.time.monotonic", lambda: now)
+    cache: ResultCache[str] = ResultCache(max_entries=4, ttl_seconds=10)
+    await cache.set(b"key", "value")
+
+    now = 1009.0
+    assert await cache.get(b"key") == "value"
+
+    now = 1011.0
+    assert await cache.get(b"key") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used() -> None:
+    cache: ResultCache[int] = ResultCache(max_entries=2, ttl_seconds=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")
+    await cache.set("c", 3)
+
+    assert await cache.get("a") == 1
+    assert await cache.get("b") is None
+    assert await cache.get("c") == 3
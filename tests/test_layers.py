@@ -79,6 +79,36 @@ async def test_regex_layer_matches_pattern() -> None:
     assert verdict.action == ActionType.DELETE
 
 
+@pytest.mark.asyncio
+async def test_regex_layer_matches_backreference_pattern() -> None:
+    registry = RuleRegistry()
+    rules = [
+        make_rule(
+            rule_id="regex-plain",
+            pattern=r"forbidden",
+            action=ActionType.DELETE,
+            priority=ViolationPriority.NSFW,
+        ),
+        # Numbered backreferences must bypass pattern fusion, which would
+        # renumber the group that \1 points at.
+        make_rule(
+            rule_id="regex-backref",
+            pattern=r"\b(\w+) \1\b",
+            action=ActionType.WARN,
+            priority=ViolationPriority.SPAM,
+        ),
+    ]
+    await registry.seed(rules)
+    layer = RegexLayer(registry, max_workers=2)
+    await layer.warmup()
+
+    verdict = await layer.evaluate(make_envelope("stop spam spam now"))
+
+    assert verdict is not None
+    assert verdict.rule_code == "regex-backref"
+    assert verdict.details["matched"] == "spam spam"
+
+
 @pytest.mark.asyncio
 async def test_omni_layer_uses_categories_and_rules() -> None:
     registry = RuleRegistry()
@@ -168,6 +198,8 @@ async def test_chatgpt_layer_maps_response_to_rule_aliases() -> None:
         content=json.dumps(payload),
         finish_reason="stop",
         tokens=42,
+        prompt_tokens=30,
+        completion_tokens=12,
     )
     client = FakeGPTClient(completion)
     layer = ChatGPTLayer(client, registry, concurrency_limit=1)
@@ -181,6 +213,49 @@ async def test_chatgpt_layer_maps_response_to_rule_aliases() -> None:
     assert verdict.priority == ViolationPriority.HATE
 
 
+@pytest.mark.asyncio
+async def test_chatgpt_layer_renders_rules_block_for_categorized_rules() -> None:
+    registry = RuleRegistry()
+    rule = make_rule(
+        rule_id="gpt-2",
+        description="no hate speech",
+        action=ActionType.BAN,
+        layer=LayerType.CHATGPT,
+        rule_type=RuleType.CONTEXTUAL,
+        category="hate",
+        priority=ViolationPriority.HATE,
+    )
+    await registry.seed([rule])
+
+    payload = {
+        "violation": False,
+        "category": "none",
+        "severity": "none",
+        "action": "none",
+        "reason": "",
+    }
+    completion = ChatCompletionResult(
+        content=json.dumps(payload),
+        finish_reason="stop",
+        tokens=5,
+        prompt_tokens=4,
+        completion_tokens=1,
+    )
+    client = FakeGPTClient(completion)
+    layer = ChatGPTLayer(client, registry, concurrency_limit=1)
+
+    # First evaluation renders the rules block; the second must serve it from
+    # the (chat_id, rules version) cache without blowing up.
+    assert await layer.evaluate(make_envelope("first message text")) is None
+    assert await layer.evaluate(make_envelope("second message text")) is None
+
+    assert client.calls == 2
+    user_message = next(msg for msg in client.last_request.messages if msg["role"] == "user")
+    text_part = next(part["text"] for part in user_message["content"] if part["type"] == "text")
+    assert "Active moderation rules" in text_part
+    assert "hate" in text_part
+
+
 @pytest.mark.asyncio
 async def test_chatgpt_layer_handles_invalid_json() -> None:
     registry = RuleRegistry()
@@ -189,6 +264,8 @@ async def test_chatgpt_layer_handles_invalid_json() -> None:
         content="non-json response",
         finish_reason="stop",
         tokens=0,
+        prompt_tokens=0,
+        completion_tokens=0,
     )
     client = FakeGPTClient(completion)
     layer = ChatGPTLayer(client, registry, concurrency_limit=1)
@@ -201,7 +278,16 @@ async def test_chatgpt_layer_handles_invalid_json() -> None:
 @pytest.mark.asyncio
 async def test_chatgpt_layer_includes_image_context() -> None:
     registry = RuleRegistry()
-    await registry.seed([])
+    rule = make_rule(
+        rule_id="gpt-img",
+        description="no violent imagery",
+        action=ActionType.BAN,
+        layer=LayerType.CHATGPT,
+        rule_type=RuleType.CONTEXTUAL,
+        category="violence",
+        priority=ViolationPriority.THREATS,
+    )
+    await registry.seed([rule])
     payload = {
         "violation": True,
         "category": "violence",
@@ -213,6 +299,8 @@ async def test_chatgpt_layer_includes_image_context() -> None:
         content=json.dumps(payload),
         finish_reason="stop",
         tokens=10,
+        prompt_tokens=8,
+        completion_tokens=2,
     )
     client = FakeGPTClient(completion)
     layer = ChatGPTLayer(client, registry, concurrency_limit=1)
@@ -222,7 +310,8 @@ async def test_chatgpt_layer_includes_image_context() -> None:
     assert verdict is not None
     assert client.last_request is not None
     user_message = next(msg for msg in client.last_request.messages if msg["role"] == "user")
-    assert "Images present: 1" in user_message["content"]
+    text_part = next(part["text"] for part in user_message["content"] if part["type"] == "text")
+    assert "Images present: 1" in text_part
 
 
 @pytest.mark.asyncio
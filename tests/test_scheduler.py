@@ -51,13 +51,28 @@ class InMemoryStorage(StorageGateway):
                 self.incidents.append(result)
 
 
+class CachingStorage(InMemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.cache: dict[bytes, dict] = {}
+
+    async def get_cached_results(self, hashes, *, max_age_seconds):
+        return {text_hash: self.cache[text_hash] for text_hash in hashes if text_hash in self.cache}
+
+    async def store_cached_results(self, entries):
+        for text_hash, payload in entries:
+            self.cache[text_hash] = payload
+
+
 class AlwaysViolatingLayer(ModerationLayer):
     layer_type = LayerType.REGEX
 
     def __init__(self) -> None:
         super().__init__(priority=10)
+        self.calls = 0
 
     async def evaluate(self, message):
+        self.calls += 1
         return ModerationVerdict(
             layer=self.layer_type,
             rule_code="always",
@@ -103,3 +118,41 @@ async def test_scheduler_processes_batches_and_invokes_decision_callback() -> No
     finally:
         await scheduler.stop()
         await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_repeated_text_from_result_cache() -> None:
+    batcher = MessageBatcher(max_batch_size=1, max_delay=0.01)
+    layer = AlwaysViolatingLayer()
+    pipeline = ModerationPipeline([layer])
+    storage = CachingStorage()
+
+    decisions: list[ModerationVerdict] = []
+    second_decision = asyncio.Event()
+
+    async def decision_callback(decision, result):
+        decisions.append(decision.verdict)
+        if len(decisions) == 2:
+            second_decision.set()
+
+    scheduler = ModerationScheduler(
+        batcher=batcher,
+        pipeline=pipeline,
+        storage=storage,
+        aggregator=PunishmentAggregator(),
+        max_concurrent_batches=1,
+        decision_callback=decision_callback,
+    )
+
+    await batcher.start()
+    await scheduler.start()
+    try:
+        await batcher.submit(make_envelope("duplicate spam"))
+        await batcher.submit(make_envelope("duplicate spam"))
+        await asyncio.wait_for(second_decision.wait(), timeout=1)
+
+        assert layer.calls == 1  # second message served from the cache
+        assert all(verdict.rule_code == "always" for verdict in decisions)
+    finally:
+        await scheduler.stop()
+        await batcher.stop()